@@ -1,6 +1,63 @@
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.auth.admin import UserAdmin
 
 from core.models import User
+from core.pagination import EstimatedCountPaginator
+
+CURSOR_VAR = 'cursor'
 
 admin.site.register(User, UserAdmin)
+
+
+class KeysetChangeList(ChangeList):
+    # pages are selected by primary key of last shown object instead of
+    # OFFSET, so every page is read from index no matter how deep it is
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_ordering(self, request, queryset):
+        return ['-pk']
+
+    def get_results(self, request):
+        # cursor is not preserved in links of filters and date hierarchy
+        self.cursor = self.params.pop(CURSOR_VAR, None)
+        queryset = self.queryset
+        if self.cursor:
+            try:
+                queryset = queryset.filter(pk__lt=int(self.cursor))
+            except ValueError as e:
+                raise IncorrectLookupParameters(e) from e
+
+        self.paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page,
+        )
+        self.result_count = self.paginator.count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+
+        results = list(queryset[:self.list_per_page + 1])
+        self.result_list = results[:self.list_per_page]
+        if len(results) > self.list_per_page:
+            self.next_page_url = self.get_query_string({
+                CURSOR_VAR: self.result_list[-1].pk,
+            })
+        else:
+            self.next_page_url = None
+        self.first_page_url = self.get_query_string() if self.cursor else None
+        self.multi_page = bool(self.next_page_url or self.first_page_url)
+
+
+class KeysetPaginationMixin:
+    # for tables too big for exact counts and sorting by any column
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    sortable_by = ()
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
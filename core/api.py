@@ -0,0 +1,14 @@
+from django.http import HttpResponse
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+
+from core.metrics import render_metrics
+
+
+class MetricsApiView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(
+            render_metrics(), content_type='text/plain; version=0.0.4',
+        )
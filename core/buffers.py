@@ -0,0 +1,75 @@
+import abc
+import atexit
+import logging
+import threading
+import time
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer(abc.ABC):
+    def __init__(self, interval, max_size):
+        self.interval = interval
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._flushed_at = time.monotonic()
+        self._flusher = None
+        self._due = threading.Event()
+        atexit.register(self.flush)
+
+    def merge(self, old, new):
+        return new
+
+    @abc.abstractmethod
+    def write(self, pending):
+        pass
+
+    def add(self, key, value):
+        with self._lock:
+            if key in self._pending:
+                value = self.merge(self._pending[key], value)
+            self._pending[key] = value
+            due = (
+                len(self._pending) >= self.max_size or
+                time.monotonic() - self._flushed_at >= self.interval
+            )
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._flush_periodically, daemon=True,
+                )
+                self._flusher.start()
+        if due:
+            # writes (and their errors) never reach thread of request which
+            # only added a value
+            self._due.set()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+        try:
+            self.write(pending)
+        except Exception:
+            # keep buffered values so next flush retries them
+            with self._lock:
+                for key, value in pending.items():
+                    if key in self._pending:
+                        value = self.merge(value, self._pending[key])
+                    self._pending[key] = value
+            raise
+
+    def _flush_periodically(self):
+        while True:
+            self._due.wait(self.interval)
+            self._due.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Flushing %s failed.', type(self).__name__)
+            finally:
+                connections.close_all()
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+
+registry = []
+_state = threading.local()
+
+
+def _escape(value):
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(),
+                 buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._values = {}
+        registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[label]) for label in self.labels)
+        with self._lock:
+            counts, total, count = self._values.get(
+                key, ([0] * len(self.buckets), 0, 0),
+            )
+            counts = [
+                bucket_count + (value <= bound)
+                for bucket_count, bound in zip(counts, self.buckets)
+            ]
+            self._values[key] = (counts, total + value, count + 1)
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, (counts, total, count) in values:
+            labels = [
+                f'{label}="{_escape(value)}"'
+                for label, value in zip(self.labels, key)
+            ]
+            for bound, bucket_count in zip(
+                    self.buckets + ('+Inf',), counts + [count]):
+                bucket_labels = ','.join(labels + [f'le="{bound}"'])
+                lines.append(
+                    f'{self.name}_bucket{{{bucket_labels}}} {bucket_count}',
+                )
+            suffix = f'{{{",".join(labels)}}}' if labels else ''
+            lines.append(f'{self.name}_sum{suffix} {total}')
+            lines.append(f'{self.name}_count{suffix} {count}')
+        return '\n'.join(lines)
+
+
+def render_metrics():
+    return '\n'.join(histogram.render() for histogram in registry) + '\n'
+
+
+request_duration = Histogram(
+    'http_request_duration_seconds',
+    'Time spent producing response.',
+    labels=('view', 'method', 'status'),
+)
+phase_duration = Histogram(
+    'phase_duration_seconds',
+    'Time spent in instrumented phases of requests.',
+    labels=('phase',),
+)
+
+
+def start_timings():
+    _state.timings = defaultdict(float)
+
+
+def pop_timings():
+    timings = getattr(_state, 'timings', None) or {}
+    _state.timings = None
+    return timings
+
+
+def record(phase, duration):
+    phase_duration.observe(duration, phase=phase)
+    timings = getattr(_state, 'timings', None)
+    if timings is not None:
+        timings[phase] += duration
+
+
+@contextmanager
+def timed(phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - start)
@@ -1,15 +1,117 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.functional import SimpleLazyObject, empty
+
+from core.metrics import (
+    pop_timings,
+    record,
+    request_duration,
+    start_timings,
+    timed,
+)
+from core.models import user_agent_buffer
+from core.routers import finish_request, has_written, start_request
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def _time_query(execute, sql, params, many, context):
+    with timed('db'):
+        return execute(sql, params, many, context)
+
+
+class _SendTimer:
+    def __init__(self):
+        self.start = time.perf_counter()
+
+    def close(self):
+        record('send', time.perf_counter() - self.start)
+
+
+class TimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        start_timings()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(_time_query),
+                    )
+                response = self.get_response(request)
+        finally:
+            timings = pop_timings()
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        request_duration.observe(
+            duration,
+            view=match.view_name if match else 'unmatched',
+            method=request.method,
+            status=response.status_code,
+        )
+        if settings.DEBUG or settings.SERVER_TIMING_HEADER:
+            timings['total'] = duration
+            response['Server-Timing'] = ', '.join(
+                f'{phase};dur={value * 1000:.1f}'
+                for phase, value in timings.items()
+            )
+        # file is sent to client after middleware returns, response is
+        # closed by server once it is done
+        response._closable_objects.append(_SendTimer())
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # unsafe requests read what they are about to modify from primary,
+        # cookie lets client read its recent writes despite replication lag
+        start_request(pinned=(
+            request.method not in SAFE_METHODS or
+            settings.DATABASE_REPLICA_PIN_COOKIE_NAME in request.COOKIES
+        ))
+        try:
+            response = self.get_response(request)
+            if has_written():
+                response.set_cookie(
+                    settings.DATABASE_REPLICA_PIN_COOKIE_NAME, '1',
+                    max_age=settings.DATABASE_REPLICA_PIN_AGE, httponly=True,
+                )
+            return response
+        finally:
+            finish_request()
+
+
 class UserAgentMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
+        # user is checked after response so users authenticated by API
+        # token are tracked as well
+        response = self.get_response(request)
+
         user = request.user
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            # view did not need user, e.g. anonymous item download, so it is
+            # not worth session query
+            return response
         user_agent = request.headers.get('User-Agent')
         if (
                 user.is_authenticated and user_agent and
                 user.last_user_agent != user_agent
         ):
-            user.last_user_agent = user_agent
-            user.save()
+            # only buffered, written (and failing) in background flusher, so
+            # completed response never turns into error
+            user_agent_buffer.add(user.pk, user_agent)
 
-        return self.get_response(request)
+        return response
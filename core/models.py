@@ -1,6 +1,29 @@
+from collections import defaultdict
+
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from core.buffers import WriteBehindBuffer
+
 
 class User(AbstractUser):
     last_user_agent = models.TextField(blank=True)
+
+
+class UserAgentBuffer(WriteBehindBuffer):
+    def write(self, pending):
+        pks_by_user_agent = defaultdict(list)
+        for pk, user_agent in pending.items():
+            pks_by_user_agent[user_agent].append(pk)
+        # only last_user_agent column of rows which really changed is written
+        for user_agent, pks in pks_by_user_agent.items():
+            User.objects.filter(pk__in=pks).exclude(
+                last_user_agent=user_agent,
+            ).update(last_user_agent=user_agent)
+
+
+user_agent_buffer = UserAgentBuffer(
+    interval=settings.USER_AGENT_FLUSH_INTERVAL,
+    max_size=settings.USER_AGENT_FLUSH_SIZE,
+)
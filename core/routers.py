@@ -0,0 +1,42 @@
+import random
+import threading
+
+from django.conf import settings
+
+_state = threading.local()
+
+
+def is_pinned():
+    # outside of requests, e.g. in commands and flusher threads, everything
+    # goes to primary
+    return getattr(_state, 'pinned', True)
+
+
+def has_written():
+    return getattr(_state, 'written', False)
+
+
+def start_request(pinned):
+    _state.pinned = pinned
+    _state.written = False
+
+
+def finish_request():
+    _state.pinned = True
+    _state.written = False
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if is_pinned() or not settings.DATABASE_REPLICAS:
+            return 'default'
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        # rest of request has to read its own writes
+        _state.pinned = True
+        _state.written = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
@@ -0,0 +1,54 @@
+import json
+import os
+from contextlib import ContextDecorator
+
+from django.conf import settings
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+# maximal number of queries allowed for every guarded endpoint, lower the
+# budget when an endpoint gets cheaper so regressions are still noticed
+BUDGETS_FILE = os.path.join(settings.BASE_DIR, 'query_budgets.json')
+
+_budgets = None
+
+
+def get_query_budget(name):
+    global _budgets
+    if _budgets is None:
+        with open(BUDGETS_FILE) as budgets_file:
+            _budgets = json.load(budgets_file)
+    try:
+        return _budgets[name]
+    except KeyError:
+        raise KeyError(f'Query budget {name!r} is not defined in budgets file')
+
+
+class query_budget(ContextDecorator):
+    # fails when code in block (or decorated test) runs more queries than
+    # budget defined in budgets file and lists all executed queries
+    def __init__(self, name, using='default'):
+        self.name = name
+        self.using = using
+
+    def __enter__(self):
+        self.budget = get_query_budget(self.name)
+        self.context = CaptureQueriesContext(connections[self.using])
+        self.context.__enter__()
+        return self.context
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+
+        queries = self.context.captured_queries
+        if len(queries) > self.budget:
+            raise AssertionError('\n'.join([
+                f'Query budget {self.name!r} exceeded: {len(queries)} '
+                f'queries executed, {self.budget} allowed.',
+                *(
+                    f'{number}. {query["sql"]}'
+                    for number, query in enumerate(queries, start=1)
+                ),
+            ]))
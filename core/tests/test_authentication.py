@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.urls import reverse_lazy
+from freezegun import freeze_time
+from rest_framework.authtoken.models import Token
+from rest_framework.status import HTTP_200_OK, HTTP_401_UNAUTHORIZED
+from rest_framework.test import APITestCase
+
+from core.authentication import CachedTokenAuthentication, token_cache
+from core.factories import UserFactory
+from items.models import stats_cache
+
+
+class CachedTokenAuthenticationTestCase(APITestCase):
+    url = reverse_lazy('stats-list')
+
+    def setUp(self):
+        token_cache.clear()
+        stats_cache.clear()
+        self.user = UserFactory()
+        self.token = Token.objects.create(user=self.user)
+
+    def _request(self, key=None):
+        return self.client.get(
+            self.url, HTTP_AUTHORIZATION=f'Token {key or self.token.key}',
+        )
+
+    def test_cached_token_is_authenticated_without_query(self):
+        # token with user and stats
+        with self.assertNumQueries(2):
+            self.assertEqual(self._request().status_code, HTTP_200_OK)
+        # stats only, they are not cached either
+        stats_cache.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(self._request().status_code, HTTP_200_OK)
+
+    def test_invalid_token_is_not_cached(self):
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                response = self._request('invalid')
+            self.assertEqual(response.status_code, HTTP_401_UNAUTHORIZED)
+
+    def test_each_request_gets_own_user(self):
+        authentication = CachedTokenAuthentication()
+        user, token = authentication.authenticate_credentials(self.token.key)
+        user.last_user_agent = 'Test UA'
+
+        with self.assertNumQueries(0):
+            other_user, other_token = (
+                authentication.authenticate_credentials(self.token.key)
+            )
+        self.assertEqual(other_user, self.user)
+        self.assertEqual(other_user.last_user_agent, '')
+        self.assertIs(other_token.user, other_user)
+
+    def test_deleted_token_is_invalidated(self):
+        self._request()
+        old_key = self.token.key
+        self.token.delete()
+        new_token = Token.objects.create(user=self.user)
+
+        self.assertEqual(
+            self._request(old_key).status_code, HTTP_401_UNAUTHORIZED,
+        )
+        self.assertEqual(self._request(new_token.key).status_code, HTTP_200_OK)
+
+    def test_deactivated_user_is_invalidated(self):
+        self._request()
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self._request().status_code, HTTP_401_UNAUTHORIZED)
+
+    def test_token_deleted_by_other_process_expires_after_ttl(self):
+        with freeze_time() as frozen_time:
+            self._request()
+            # deleted without signals, as if by another process
+            Token.objects.filter(pk=self.token.pk)._raw_delete('default')
+
+            self.assertEqual(self._request().status_code, HTTP_200_OK)
+            frozen_time.tick(settings.TOKEN_CACHE_TTL)
+            self.assertEqual(
+                self._request().status_code, HTTP_401_UNAUTHORIZED,
+            )
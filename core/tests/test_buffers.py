@@ -0,0 +1,105 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from core.buffers import WriteBehindBuffer
+
+
+class SumBuffer(WriteBehindBuffer):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.written = []
+
+    def merge(self, old, new):
+        return old + new
+
+    def write(self, pending):
+        self.written.append(pending)
+
+
+class FailingBuffer(SumBuffer):
+    def write(self, pending):
+        raise RuntimeError
+
+
+class WriteBehindBufferTestCase(SimpleTestCase):
+    def test_buffer_requires_write(self):
+        with self.assertRaises(TypeError):
+            WriteBehindBuffer(interval=3600, max_size=100)
+
+    def test_add_merges_values_of_the_same_key(self):
+        buffer = SumBuffer(interval=3600, max_size=100)
+        buffer.add('a', 1)
+        buffer.add('a', 2)
+        buffer.add('b', 1)
+        buffer.flush()
+
+        self.assertEqual(buffer.written, [{'a': 3, 'b': 1}])
+
+    def _wait_for_write(self, buffer):
+        for _ in range(100):
+            if buffer.written:
+                return
+            time.sleep(0.01)
+
+    def test_add_wakes_flusher_of_full_buffer(self):
+        buffer = SumBuffer(interval=3600, max_size=2)
+        buffer.add('a', 1)
+        self.assertEqual(buffer.written, [])
+        buffer.add('b', 1)
+        self._wait_for_write(buffer)
+
+        self.assertEqual(buffer.written, [{'a': 1, 'b': 1}])
+
+    def test_add_wakes_flusher_after_interval(self):
+        buffer = SumBuffer(interval=0, max_size=100)
+        buffer.add('a', 1)
+        self._wait_for_write(buffer)
+
+        self.assertEqual(buffer.written, [{'a': 1}])
+
+    def test_add_never_raises_errors_of_due_flush(self):
+        buffer = FailingBuffer(interval=3600, max_size=1)
+        with self.assertLogs('core.buffers', 'ERROR') as logs:
+            buffer.add('a', 1)
+            for _ in range(100):
+                if logs.records:
+                    break
+                time.sleep(0.01)
+
+        self.assertEqual(buffer._pending, {'a': 1})
+        buffer._pending.clear()
+
+    def test_flush_empty_buffer_writes_nothing(self):
+        buffer = SumBuffer(interval=3600, max_size=100)
+        buffer.flush()
+
+        self.assertEqual(buffer.written, [])
+
+    def test_failed_write_keeps_values_buffered(self):
+        buffer = FailingBuffer(interval=3600, max_size=100)
+        buffer.add('a', 1)
+        with self.assertRaises(RuntimeError):
+            buffer.flush()
+        buffer.add('a', 1)
+
+        self.assertEqual(buffer._pending, {'a': 2})
+        buffer._pending.clear()
+
+    def test_concurrent_adds_are_not_lost(self):
+        buffer = SumBuffer(interval=3600, max_size=7)
+
+        def add():
+            for i in range(1000):
+                buffer.add(i % 10, 1)
+
+        threads = [threading.Thread(target=add) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        buffer.flush()
+
+        total = sum(sum(pending.values()) for pending in buffer.written)
+        self.assertEqual(total, 8000)
@@ -0,0 +1,44 @@
+from django.test import SimpleTestCase
+from freezegun import freeze_time
+
+from core.caches import LRUCache
+
+
+class LRUCacheTestCase(SimpleTestCase):
+    def test_get_returns_default_for_missing_key(self):
+        cache = LRUCache(max_size=2, ttl=60)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('a', 0), 0)
+
+    def test_evicts_least_recently_used_entry(self):
+        cache = LRUCache(max_size=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_entries_expire(self):
+        cache = LRUCache(max_size=2, ttl=60)
+        with freeze_time('2017-10-25 12:00:00') as frozen_time:
+            cache.set('a', 1)
+            cache.set('b', 2, ttl=120)
+            frozen_time.tick(60)
+
+            self.assertIsNone(cache.get('a'))
+            self.assertEqual(cache.get('b'), 2)
+            self.assertEqual(len(cache), 1)
+
+    def test_delete_matching_removes_matching_entries(self):
+        cache = LRUCache(max_size=3, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('c', 3)
+        cache.delete_matching(lambda value: value % 2)
+        cache.delete('b')
+
+        self.assertEqual(len(cache), 0)
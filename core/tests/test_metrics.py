@@ -0,0 +1,102 @@
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.status import HTTP_200_OK, HTTP_401_UNAUTHORIZED
+from rest_framework.test import APITestCase
+
+from core.factories import UserFactory
+from core.metrics import Histogram, registry
+from items.factories import ItemFactory
+from items.hashers import make_item_password
+
+
+class HistogramTestCase(SimpleTestCase):
+    def setUp(self):
+        self.histogram = Histogram(
+            'test_seconds', 'Test.', labels=('phase',), buckets=(0.1, 1),
+        )
+
+    def tearDown(self):
+        registry.remove(self.histogram)
+
+    def test_render_without_observations(self):
+        self.assertEqual(
+            self.histogram.render(),
+            '# HELP test_seconds Test.\n# TYPE test_seconds histogram',
+        )
+
+    def test_render_cumulative_buckets(self):
+        for value in (0.05, 0.5, 5):
+            self.histogram.observe(value, phase='db')
+        self.histogram.observe(0.5, phase='say "hi"')
+
+        self.assertEqual(self.histogram.render().split('\n')[2:], [
+            'test_seconds_bucket{phase="db",le="0.1"} 1',
+            'test_seconds_bucket{phase="db",le="1"} 2',
+            'test_seconds_bucket{phase="db",le="+Inf"} 3',
+            'test_seconds_sum{phase="db"} 5.55',
+            'test_seconds_count{phase="db"} 3',
+            'test_seconds_bucket{phase="say \\"hi\\"",le="0.1"} 0',
+            'test_seconds_bucket{phase="say \\"hi\\"",le="1"} 1',
+            'test_seconds_bucket{phase="say \\"hi\\"",le="+Inf"} 1',
+            'test_seconds_sum{phase="say \\"hi\\""} 0.5',
+            'test_seconds_count{phase="say \\"hi\\""} 1',
+        ])
+
+
+class TimingTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.token = Token.objects.create(user=cls.user)
+
+    def _get_item(self):
+        item = ItemFactory(
+            user=self.user, url='http://kodziek.pl',
+            password=make_item_password('password'),
+        )
+        return self.client.get(
+            reverse('item-detail', kwargs={'uuid': item.uuid}),
+            {'password': 'password'},
+        )
+
+    def test_response_has_no_server_timing_by_default(self):
+        response = self._get_item()
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_response_has_server_timing_of_phases(self):
+        response = self._get_item()
+        phases = {
+            timing.split(';')[0]
+            for timing in response['Server-Timing'].split(', ')
+        }
+
+        self.assertEqual(
+            phases, {'item_lookup', 'db', 'password', 'visit_count', 'total'},
+        )
+
+    def test_metrics_require_authentication(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTP_401_UNAUTHORIZED)
+
+    def test_metrics_are_exposed_in_prometheus_format(self):
+        self.client.get(reverse('stats-list'))
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION=f'Token {self.token.key}',
+        )
+        content = response.content.decode()
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(
+            response['Content-Type'], 'text/plain; version=0.0.4',
+        )
+        self.assertIn(
+            '# TYPE http_request_duration_seconds histogram', content,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{view="stats-list",'
+            'method="GET",status="401"}',
+            content,
+        )
+        self.assertIn('phase_duration_seconds_count{phase="db"}', content)
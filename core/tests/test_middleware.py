@@ -1,20 +1,32 @@
+import time
+from types import SimpleNamespace
+from unittest import mock
 from unittest.mock import MagicMock, PropertyMock
 
 from django.contrib.auth.models import AnonymousUser
+from django.db import DatabaseError
 from django.test import TestCase
+from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
+from rest_framework.authtoken.models import Token
+from rest_framework.status import HTTP_200_OK
 
 from core.factories import UserFactory
 from core.middleware import UserAgentMiddleware
+from core.models import UserAgentBuffer, user_agent_buffer
 
 
 class UserAgentMiddlewareTestCase(TestCase):
     def setUp(self):
         self.middleware = UserAgentMiddleware(lambda request: None)
 
-    def _get_request(self, user):
+    def tearDown(self):
+        user_agent_buffer.flush()
+
+    def _get_request(self, user, user_agent='Test UA'):
         request = MagicMock()
         type(request).headers = PropertyMock(
-            return_value={'User-Agent': 'Test UA'},
+            return_value={'User-Agent': user_agent},
         )
         request.user = user
         return request
@@ -30,4 +42,69 @@ class UserAgentMiddlewareTestCase(TestCase):
         self.assertEqual(user.last_user_agent, '')
         request = self._get_request(user)
         self.middleware(request)
+        user_agent_buffer.flush()
+        user.refresh_from_db()
         self.assertEqual(user.last_user_agent, request.headers['User-Agent'])
+
+    def test_user_agent_changes_are_coalesced_into_single_update(self):
+        user = UserFactory()
+        for user_agent in ('First UA', 'Second UA'):
+            self.middleware(self._get_request(user, user_agent))
+
+        with self.assertNumQueries(1):
+            user_agent_buffer.flush()
+        user.refresh_from_db()
+        self.assertEqual(user.last_user_agent, 'Second UA')
+
+    def test_only_last_user_agent_is_written(self):
+        user = UserFactory()
+        self.middleware(self._get_request(user))
+        user.first_name = 'Changed'
+        user.save()
+
+        user_agent_buffer.flush()
+        user.refresh_from_db()
+        self.assertEqual(user.last_user_agent, 'Test UA')
+        self.assertEqual(user.first_name, 'Changed')
+
+    def test_user_authenticated_by_api_token_is_tracked(self):
+        user = UserFactory()
+        token = Token.objects.create(user=user)
+        self.client.get(
+            reverse('stats-list'), HTTP_USER_AGENT='API UA',
+            HTTP_AUTHORIZATION=f'Token {token.key}',
+        )
+
+        user_agent_buffer.flush()
+        user.refresh_from_db()
+        self.assertEqual(user.last_user_agent, 'API UA')
+
+    def test_failed_flush_does_not_fail_request(self):
+        user = UserFactory()
+        token = Token.objects.create(user=user)
+        with mock.patch.object(
+                UserAgentBuffer, 'write', side_effect=DatabaseError,
+        ), mock.patch.object(user_agent_buffer, 'max_size', 1), \
+                self.assertLogs('core.buffers', 'ERROR') as logs:
+            response = self.client.get(
+                reverse('stats-list'), HTTP_USER_AGENT='API UA',
+                HTTP_AUTHORIZATION=f'Token {token.key}',
+            )
+            for _ in range(100):
+                if logs.records:
+                    break
+                time.sleep(0.01)
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        user_agent_buffer.flush()
+        user.refresh_from_db()
+        self.assertEqual(user.last_user_agent, 'API UA')
+
+    def test_unevaluated_lazy_user_is_not_evaluated(self):
+        get_user = MagicMock()
+        # mock request would evaluate lazy user assigned to it
+        request = SimpleNamespace(
+            user=SimpleLazyObject(get_user), headers={'User-Agent': 'Test UA'},
+        )
+        self.middleware(request)
+        get_user.assert_not_called()
@@ -0,0 +1,38 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from core.factories import UserFactory
+from core.models import User
+from core.pagination import EstimatedCountPaginator, estimate_count
+
+
+class EstimatedCountPaginatorTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        UserFactory.create_batch(3)
+
+    def test_estimate_is_not_available_without_postgresql(self):
+        self.assertIsNone(estimate_count(User.objects.all()))
+
+    def test_counts_exactly_without_estimate(self):
+        paginator = EstimatedCountPaginator(User.objects.order_by('pk'), 2)
+
+        self.assertEqual(paginator.count, 3)
+        self.assertFalse(paginator.is_estimated)
+
+    @mock.patch('core.pagination.estimate_count', return_value=20)
+    def test_counts_exactly_small_estimates(self, estimate_count_mock):
+        paginator = EstimatedCountPaginator(User.objects.order_by('pk'), 2)
+
+        self.assertEqual(paginator.count, 3)
+        self.assertFalse(paginator.is_estimated)
+
+    @mock.patch('core.pagination.estimate_count', return_value=123456)
+    def test_uses_large_estimates(self, estimate_count_mock):
+        paginator = EstimatedCountPaginator(User.objects.order_by('pk'), 2)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 123456)
+        self.assertTrue(paginator.is_estimated)
+        self.assertEqual(paginator.num_pages, 61728)
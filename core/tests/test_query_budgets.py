@@ -0,0 +1,103 @@
+from django.contrib.auth.hashers import make_password
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core.authentication import token_cache
+from core.factories import UserFactory
+from core.testing import query_budget
+from items.factories import ItemFactory
+from items.hashers import make_item_password
+from items.models import item_cache, stats_cache
+
+
+class QueryBudgetTestCase(TestCase):
+    # requests are guarded with cold caches, as after deploy or expiration
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory(password=make_password('password'))
+        cls.token = Token.objects.create(user=cls.user)
+        cls.item = ItemFactory(
+            user=cls.user, url='http://kodziek.pl',
+            password=make_item_password('password'),
+        )
+
+    def setUp(self):
+        token_cache.clear()
+        item_cache.clear()
+        stats_cache.clear()
+
+    def _api_kwargs(self):
+        # user agent change is buffered, it must not add queries to request
+        return {
+            'HTTP_AUTHORIZATION': f'Token {self.token.key}',
+            'HTTP_USER_AGENT': 'client/2.0',
+        }
+
+    def test_api_login(self):
+        with query_budget('api.login'):
+            response = self.client.post(
+                '/api/login/',
+                {'username': self.user.username, 'password': 'password'},
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_item_create(self):
+        with query_budget('api.item.create'):
+            response = self.client.post(
+                reverse('item-list'), {'url': 'http://kodziek.pl'},
+                **self._api_kwargs(),
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_api_item_retrieve(self):
+        with query_budget('api.item.retrieve'):
+            response = self.client.get(
+                reverse('item-detail', kwargs={'uuid': self.item.uuid}),
+                {'password': 'password'},
+            )
+        self.assertEqual(response.status_code, 302)
+
+    def test_api_stats(self):
+        for _ in range(3):
+            ItemFactory(user=self.user)
+
+        with query_budget('api.stats'):
+            response = self.client.get(
+                reverse('stats-list'), **self._api_kwargs(),
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_item_create_form(self):
+        self.client.force_login(self.user)
+        with query_budget('items.create.get'):
+            response = self.client.get(reverse('items:create'))
+        self.assertEqual(response.status_code, 200)
+
+        with query_budget('items.create.post'):
+            response = self.client.post(
+                reverse('items:create'), {'url': 'http://kodziek.pl'},
+            )
+        self.assertEqual(response.status_code, 302)
+
+    def test_item_get_form(self):
+        url = reverse('items:get', kwargs={'uuid': self.item.uuid})
+        with query_budget('items.get.get'):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        with query_budget('items.get.post'):
+            response = self.client.post(url, {'password': 'password'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_admin_changelist(self):
+        for _ in range(3):
+            ItemFactory(user=self.user)
+        admin = UserFactory(is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+
+        with query_budget('admin.item.changelist'):
+            response = self.client.get(
+                reverse('admin:items_item_changelist'),
+            )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,123 @@
+import json
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core.authentication import token_cache
+from core.factories import UserFactory
+from core.routers import (
+    PrimaryReplicaRouter, finish_request, has_written, start_request,
+)
+from items.factories import ItemFactory
+from items.models import Item, ItemDailyStats, item_cache, stats_cache
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class PrimaryReplicaRouterTestCase(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def tearDown(self):
+        finish_request()
+
+    def test_reads_outside_of_request_go_to_primary(self):
+        self.assertEqual(self.router.db_for_read(Item), 'default')
+
+    def test_reads_of_unpinned_request_go_to_replica(self):
+        start_request(pinned=False)
+        self.assertEqual(self.router.db_for_read(Item), 'replica')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_reads_go_to_primary_without_replicas(self):
+        start_request(pinned=False)
+        self.assertEqual(self.router.db_for_read(Item), 'default')
+
+    def test_write_pins_rest_of_request_to_primary(self):
+        start_request(pinned=False)
+        self.assertEqual(self.router.db_for_write(Item), 'default')
+
+        self.assertTrue(has_written())
+        self.assertEqual(self.router.db_for_read(Item), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingMiddlewareTestCase(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        token_cache.clear()
+        item_cache.clear()
+        stats_cache.clear()
+        # replicated rows
+        self.user = UserFactory()
+        self.user.save(using='replica')
+        self.token = Token.objects.create(user=self.user)
+        self.token.save(using='replica')
+
+    def _request(self, method, url, data=None, **kwargs):
+        return getattr(self.client, method)(
+            url, data, HTTP_AUTHORIZATION=f'Token {self.token.key}',
+            **kwargs,
+        )
+
+    def _create_item(self, using):
+        item = ItemFactory.build(user=self.user)
+        item.save(using=using)
+        return reverse('items:get', kwargs={'uuid': item.uuid})
+
+    def test_safe_request_reads_from_replica(self):
+        url = self._create_item(using='replica')
+
+        with self.assertNumQueries(0, using='default'):
+            response = self._request('get', url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(
+            settings.DATABASE_REPLICA_PIN_COOKIE_NAME, response.cookies,
+        )
+
+    def test_unsafe_request_uses_primary_and_pins_client(self):
+        with self.assertNumQueries(0, using='replica'):
+            response = self._request(
+                'post', reverse('item-list'), {'url': 'http://kodziek.pl'},
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Item.objects.using('default').exists())
+        cookie = response.cookies[settings.DATABASE_REPLICA_PIN_COOKIE_NAME]
+        self.assertEqual(
+            cookie['max-age'], settings.DATABASE_REPLICA_PIN_AGE,
+        )
+
+        # item is not replicated yet, pinned client still finds it
+        created = json.loads(response.content)
+        with self.assertNumQueries(0, using='replica'):
+            response = self._request(
+                'get', f'{created["url"]}?password={created["password"]}',
+            )
+        self.assertEqual(response.status_code, 302)
+
+    def test_pinned_client_reads_from_primary(self):
+        url = self._create_item(using='default')
+        self.client.cookies[settings.DATABASE_REPLICA_PIN_COOKIE_NAME] = '1'
+
+        with self.assertNumQueries(0, using='replica'):
+            response = self._request('get', url)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_cached_stats_are_read_from_primary(self):
+        ItemDailyStats.objects.create(date='2017-10-25', links=1)
+
+        # token is still read from replica
+        with self.assertNumQueries(1, using='default'):
+            response = self._request('get', reverse('stats-list'))
+
+        self.assertEqual(
+            json.loads(response.content),
+            {'2017-10-25': {'files': 0, 'links': 1}},
+        )
@@ -1,13 +1,56 @@
+from datetime import datetime
+
 from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 
+from core.admin import KeysetPaginationMixin
 from items.forms import ItemPasswordForm
 from items.models import Item
 
 
+class ExpiredListFilter(admin.SimpleListFilter):
+    title = 'expired'
+    parameter_name = 'expired'
+
+    def lookups(self, request, model_admin):
+        return (('0', 'No'), ('1', 'Yes'))
+
+    def queryset(self, request, queryset):
+        # range on indexed expires_at, never a computed condition
+        if self.value() == '0':
+            return queryset.filter(expires_at__gt=datetime.now())
+        if self.value() == '1':
+            return queryset.filter(expires_at__lte=datetime.now())
+        return queryset
+
+
+class UserListFilter(admin.SimpleListFilter):
+    title = 'user'
+    parameter_name = 'user__id__exact'
+
+    @staticmethod
+    def get_owners():
+        # items of every user are probed once by index, so cost grows with
+        # number of users, never with number of items
+        return get_user_model().objects.annotate(has_items=Exists(
+            Item.all_objects.filter(user=OuterRef('pk')),
+        )).filter(has_items=True).order_by('pk')
+
+    def lookups(self, request, model_admin):
+        return [(str(user.pk), str(user)) for user in self.get_owners()]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(user_id=self.value())
+        return queryset
+
+
 @admin.register(Item)
-class ItemAdmin(admin.ModelAdmin):
+class ItemAdmin(KeysetPaginationMixin, admin.ModelAdmin):
     fields = ('password',)
-    list_display = ('uuid', '__str__', 'create_date')
+    list_display = ('uuid', '__str__', 'create_date', 'expires_at')
+    list_filter = (ExpiredListFilter, UserListFilter)
     form = ItemPasswordForm
 
     def get_queryset(self, request):
@@ -1,14 +1,62 @@
-from django.contrib.auth.hashers import check_password
-from django.http import FileResponse, Http404
+import hashlib
+import json
+from datetime import timedelta
+from itertools import chain
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect
-from rest_framework.parsers import MultiPartParser
+from django.utils.cache import get_conditional_response
+from rest_framework import mixins
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.status import HTTP_201_CREATED, HTTP_409_CONFLICT
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.viewsets import GenericViewSet, ModelViewSet
+
+from items.delivery import get_file_response, is_resumed_download
+from items.grants import check_grant, get_request_grant, set_grant
+from items.hashers import check_item_password
+from items.models import Item, ItemDailyStats, Upload, stats_cache
+from items.serializers import (
+    ItemCreateSerializer,
+    ItemSerializer,
+    ItemStatusRequestSerializer,
+    ItemStatusSerializer,
+    StatsRequestSerializer,
+    UploadSerializer,
+)
+
+STATS_CHUNK_SIZE = 1000
+
 
-from items.models import Item
-from items.serializers import ItemCreateSerializer, ItemSerializer
+def get_next_bucket(bucket, granularity):
+    if granularity == 'day':
+        return bucket + timedelta(days=1)
+    if granularity == 'week':
+        return bucket + timedelta(days=7)
+    return (bucket.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def iter_stats_json(rows, fields):
+    # JSON object is built in chunks, so rows can be read from database
+    # lazily and response of any size takes constant memory
+    yield '{'
+    chunk = []
+    for row in rows:
+        values = json.dumps(
+            {field: row[field] for field in fields}, separators=(',', ':'),
+        )
+        chunk.append(f'"{row["bucket"]:%Y-%m-%d}":{values}')
+        if len(chunk) == STATS_CHUNK_SIZE:
+            yield ','.join(chunk) + ','
+            chunk = []
+    yield ','.join(chunk) + '}'
 
 
 class ItemApiViewSet(ModelViewSet):
@@ -16,9 +64,10 @@ class ItemApiViewSet(ModelViewSet):
     lookup_field = 'uuid'
     http_method_names = ('get', 'post')
     parser_classes = (MultiPartParser,)
+    granted = False
 
     def get_permissions(self):
-        if self.action == 'create':
+        if self.action in ('create', 'bulk', 'status'):
             return [IsAuthenticated()]
         return []
 
@@ -28,43 +77,217 @@ class ItemApiViewSet(ModelViewSet):
         return ItemCreateSerializer
 
     def get_object(self):
-        obj = super().get_object()
+        try:
+            obj = Item.get_cached(self.kwargs[self.lookup_field])
+        except Item.DoesNotExist:
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        self.granted = check_grant(get_request_grant(self.request), obj)
+        if self.granted:
+            return obj
         password = self.request.query_params.get('password')
-        if not check_password(password, obj.password):
+        if not check_item_password(password, obj):
             raise Http404
         return obj
 
     def retrieve(self, request, *args, **kwargs):
         item = self.get_object()
-        Item.increment_visit_count(item.pk)
         if item.url:
-            return redirect(item.url)
-        return FileResponse(item.file)
+            response = redirect(item.url)
+        else:
+            response = get_file_response(request, item)
+        if self.granted:
+            return response
+
+        # resumed downloads were already counted by their first request
+        if not is_resumed_download(request, item):
+            Item.increment_visit_count(item.pk)
+        return set_grant(response, request, item)
+
+    # JSON list of entries or multipart fields like [0]url and [1]file
+    @action(
+        detail=False, methods=['post'],
+        parser_classes=(JSONParser, MultiPartParser),
+    )
+    def bulk(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=HTTP_201_CREATED)
+
+    # POST as hundreds of UUIDs would not fit in query string
+    @action(detail=False, methods=['post'], parser_classes=(JSONParser,))
+    def status(self, request, *args, **kwargs):
+        serializer = ItemStatusRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        uuids = serializer.validated_data['uuids']
+
+        # single lookup by unique uuid index, files and password hashes are
+        # never touched
+        items = (
+            Item.objects
+            .filter(user=request.user, uuid__in=uuids)
+            .only('uuid', 'expires_at', 'visit_count')
+        )
+        missing = {'exists': False, 'expires_at': None, 'visit_count': None}
+        response = {str(uuid): missing for uuid in uuids}
+        for item in items:
+            response[str(item.uuid)] = ItemStatusSerializer(item).data
+        return Response(response)
 
 
 class StatsApiViewSet(ModelViewSet):
     http_method_names = ('get',)
     renderer_classes = (JSONRenderer,)
-    queryset = Item.all_objects.all()
+    queryset = ItemDailyStats.objects.all()
     permission_classes = (IsAuthenticated,)
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.filter(visit_count__gt=0)
-
-    def _format_response(self, queryset):
-        response = {}
-        for item in queryset:
-            create_date = item.create_date.strftime('%Y-%m-%d')
-            if create_date not in response:
-                response[create_date] = {
-                    'files': 0,
-                    'links': 0,
-                }
-            response[create_date]['links' if item.url else 'files'] += 1
-        return response
+    def filter_queryset(self, queryset):
+        params = self.params
+        if params.get('user') is not None:
+            queryset = queryset.filter(user_id=params['user'])
+        if params.get('since'):
+            queryset = queryset.filter(date__gte=params['since'])
+        if params.get('until'):
+            queryset = queryset.filter(date__lte=params['until'])
+        if params.get('cursor'):
+            queryset = queryset.filter(date__gte=params['cursor'])
+        return queryset
 
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        response = self._format_response(queryset)
-        return Response(response)
+        serializer = StatsRequestSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        self.params = serializer.validated_data
+        user = self.params.get('user')
+        if user is not None and user != request.user.pk and (
+                not request.user.is_staff
+        ):
+            raise PermissionDenied('Cannot read stats of other users.')
+
+        # new version of rollup misses all cached entries, validators are
+        # derived from body so all processes agree on them
+        key = (ItemDailyStats.version, tuple(sorted(self.params.items())))
+        entry = stats_cache.get(key)
+        response = None
+        if entry is None:
+            response, entry = self._get_stats_response(request)
+            if entry is None:
+                return response
+            stats_cache.set(key, entry)
+
+        not_modified = get_conditional_response(request, etag=entry['etag'])
+        if not_modified is not None:
+            not_modified['ETag'] = entry['etag']
+            return not_modified
+        if response is None:
+            response = HttpResponse(
+                entry['body'], content_type='application/json',
+            )
+        if entry['link']:
+            response['Link'] = entry['link']
+        response['ETag'] = entry['etag']
+        return response
+
+    def _get_stats_response(self, request):
+        # stats are read from primary as replica could still miss change
+        # which bumped version, and would be cached until TTL
+        queryset = self.filter_queryset(self.get_queryset()).using(
+            DEFAULT_DB_ALIAS,
+        )
+        granularity = self.params['granularity']
+        rows = ItemDailyStats.group(queryset, granularity)
+        fields = (
+            (self.params['type'],) if 'type' in self.params
+            else ('files', 'links')
+        )
+        limit = self.params.get('limit')
+        link = None
+        if limit:
+            rows = list(rows[:limit + 1])
+            if len(rows) > limit:
+                rows = rows[:limit]
+                cursor = get_next_bucket(rows[-1]['bucket'], granularity)
+                next_url = replace_query_param(
+                    request.build_absolute_uri(), 'cursor', cursor.isoformat(),
+                )
+                link = f'<{next_url}>; rel="next"'
+        else:
+            rows = rows.iterator(chunk_size=STATS_CHUNK_SIZE)
+
+        # body is collected while it is small enough to be cached, query is
+        # therefore executed here, while request is routed and timed
+        chunks = iter_stats_json(rows, fields)
+        body = []
+        length = 0
+        for chunk in chunks:
+            body.append(chunk)
+            length += len(chunk)
+            if length > settings.ITEMS_STATS_CACHE_MAX_BODY:
+                # rest is streamed, without validators as body is unknown
+                response = StreamingHttpResponse(
+                    chain(body, chunks), content_type='application/json',
+                )
+                if link:
+                    response['Link'] = link
+                return response, None
+
+        body = ''.join(body)
+        etag = f'"{hashlib.sha256(body.encode()).hexdigest()}"'
+        return None, {'etag': etag, 'body': body, 'link': link}
+
+
+class UploadApiViewSet(
+        mixins.CreateModelMixin, mixins.RetrieveModelMixin, GenericViewSet,
+):
+    lookup_field = 'uuid'
+    parser_classes = (JSONParser, MultiPartParser)
+    permission_classes = (IsAuthenticated,)
+    serializer_class = UploadSerializer
+
+    def get_queryset(self):
+        return Upload.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def update(self, request, *args, **kwargs):
+        upload = self.get_object()
+        try:
+            offset = int(request.query_params['offset'])
+        except (KeyError, ValueError):
+            raise ValidationError({'offset': ['A valid integer is required.']})
+
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+        if upload.size is not None and offset + length > upload.size:
+            raise ValidationError(
+                {'offset': ['Chunk exceeds declared upload size.']},
+            )
+        # chunk is streamed to disk, request.data would buffer it
+        if offset != upload.offset or not upload.write(request.stream, offset):
+            upload.refresh_from_db()
+            return Response(
+                self.get_serializer(upload).data, status=HTTP_409_CONFLICT,
+            )
+        return Response(self.get_serializer(upload).data)
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, *args, **kwargs):
+        upload = self.get_object()
+        if upload.size is not None and upload.offset != upload.size:
+            raise ValidationError(
+                {'offset': ['Upload has not been completed yet.']},
+            )
+
+        data = {'file': upload.open_part()}
+        if 'lifetime' in request.data:
+            data['lifetime'] = request.data['lifetime']
+        serializer = ItemCreateSerializer(
+            data=data, context=self.get_serializer_context(),
+        )
+        try:
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        finally:
+            data['file'].close()
+        upload.delete()
+        return Response(serializer.data, status=HTTP_201_CREATED)
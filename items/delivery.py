@@ -0,0 +1,219 @@
+import gzip
+import mimetypes
+import re
+import uuid
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+from items.storage import get_original_name, is_compressed_name
+
+CHUNK_SIZE = 64 * 1024
+MAX_RANGES = 16
+RANGE_RE = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+
+
+def accepts_gzip(request):
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    for coding in header.split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() in ('gzip', '*'):
+            quality = params.strip().partition('q=')[2]
+            try:
+                return float(quality or 1) > 0
+            except ValueError:
+                return False
+    return False
+
+
+def parse_range_header(header, size):
+    # returns None when header should be ignored, empty list when none of
+    # ranges can be satisfied or list of inclusive (start, end) tuples
+    unit, _, ranges_spec = header.partition('=')
+    if unit.strip() != 'bytes':
+        return None
+    specs = ranges_spec.split(',')
+    if len(specs) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for spec in specs:
+        match = RANGE_RE.match(spec)
+        if not match or match.groups() == ('', ''):
+            return None
+        start, end = match.groups()
+        if not start:
+            # suffix range with last N bytes
+            start, end = max(size - int(end), 0), size - 1
+        else:
+            start = int(start)
+            if end and int(end) < start:
+                return None
+            end = min(int(end), size - 1) if end else size - 1
+        if start < size:
+            ranges.append((start, end))
+    return ranges
+
+
+def _get_validators(item):
+    return f'"{item.uuid}"', http_date(item.create_date.timestamp())
+
+
+def _if_range_matches(request, item):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    etag, last_modified = _get_validators(item)
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == parse_http_date_safe(
+        last_modified,
+    )
+
+
+def _get_requested_ranges(request, item):
+    header = request.META.get('HTTP_RANGE')
+    if header and _if_range_matches(request, item):
+        return parse_range_header(header, item.file.size)
+    return None
+
+
+def is_resumed_download(request, item):
+    # download is resumed only when every served range skips the first byte,
+    # ignored and unsatisfiable ranges or ranges from byte 0 are new visits
+    if not item.file or is_compressed_name(item.file.name):
+        return False
+    ranges = _get_requested_ranges(request, item)
+    return bool(ranges) and all(start > 0 for start, _ in ranges)
+
+
+def _iter_ranges(file, ranges, boundaries=None):
+    try:
+        for index, (start, end) in enumerate(ranges):
+            if boundaries:
+                yield boundaries[index]
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        if boundaries:
+            yield boundaries[-1]
+    finally:
+        file.close()
+
+
+def _get_range_response(item, ranges):
+    size = item.file.size
+    content_type = (
+        mimetypes.guess_type(item.file.name)[0] or 'application/octet-stream'
+    )
+    file = item.file.open('rb')
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        response = StreamingHttpResponse(
+            _iter_ranges(file, ranges),
+            status=206, content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+        return response
+
+    boundary = uuid.uuid4().hex
+    boundaries = [
+        (
+            f'\r\n--{boundary}\r\nContent-Type: {content_type}\r\n'
+            f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+        ).encode()
+        for start, end in ranges
+    ] + [f'\r\n--{boundary}--\r\n'.encode()]
+    response = StreamingHttpResponse(
+        _iter_ranges(file, ranges, boundaries), status=206,
+        content_type=f'multipart/byteranges; boundary={boundary}',
+    )
+    response['Content-Length'] = sum(map(len, boundaries)) + sum(
+        end - start + 1 for start, end in ranges
+    )
+    return response
+
+
+def iter_decompressed(file):
+    try:
+        with gzip.GzipFile(fileobj=file, mode='rb') as decompressed_file:
+            for chunk in iter(lambda: decompressed_file.read(CHUNK_SIZE), b''):
+                yield chunk
+    finally:
+        file.close()
+
+
+def _get_compressed_response(request, item):
+    # byte ranges of compressed file cannot be served without decompressing
+    # it, so Range header is ignored
+    content_type = (
+        mimetypes.guess_type(get_original_name(item.file.name))[0] or
+        'application/octet-stream'
+    )
+    etag, last_modified = _get_validators(item)
+    if accepts_gzip(request):
+        response = FileResponse(
+            item.file.open('rb'), content_type=content_type,
+        )
+        response['Content-Encoding'] = 'gzip'
+        response['Content-Length'] = item.file.size
+        etag = f'"{item.uuid}-gzip"'
+    else:
+        response = StreamingHttpResponse(
+            iter_decompressed(item.file.open('rb')),
+            content_type=content_type,
+        )
+    response['Accept-Ranges'] = 'none'
+    response['ETag'], response['Last-Modified'] = etag, last_modified
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def _get_stream_response(request, item):
+    ranges = _get_requested_ranges(request, item)
+    if ranges is None:
+        response = FileResponse(item.file)
+    elif not ranges:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{item.file.size}'
+    else:
+        response = _get_range_response(item, ranges)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'], response['Last-Modified'] = _get_validators(item)
+    return response
+
+
+def get_file_response(request, item):
+    delivery = settings.ITEMS_FILE_DELIVERY
+    if is_compressed_name(item.file.name):
+        # front proxy would send compressed file without Content-Encoding
+        return _get_compressed_response(request, item)
+    if delivery == 'stream':
+        return _get_stream_response(request, item)
+
+    # front proxy serves the file itself and detects its content type
+    response = HttpResponse()
+    del response['Content-Type']
+    if delivery == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = quote(
+            f'{settings.ITEMS_FILE_ACCEL_REDIRECT_PREFIX}{item.file.name}',
+        )
+    elif delivery == 'x-sendfile':
+        response['X-Sendfile'] = item.file.path
+    else:
+        raise ImproperlyConfigured(
+            f'Unknown ITEMS_FILE_DELIVERY value: {delivery}.',
+        )
+    return response
@@ -1,11 +1,18 @@
 from django import forms
-from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.hashers import make_password
 from django.core.exceptions import ValidationError
 
+from items.hashers import check_item_password
 from items.models import Item
+from items.validators import validate_lifetime
 
 
 class ItemForm(forms.ModelForm):
+    lifetime = forms.DurationField(
+        required=False, validators=[validate_lifetime],
+        help_text='Optional, in seconds or as [DD] [HH:[MM:]]ss.',
+    )
+
     class Meta:
         fields = ('url', 'file')
         model = Item
@@ -42,7 +49,7 @@ class ItemAccessForm(forms.Form):
 
     def clean(self):
         password = self.cleaned_data.get('password')
-        if not check_password(password, self.item.password):
+        if not check_item_password(password, self.item):
             self.add_error('password', 'Incorrect password.')
         return self.cleaned_data
 
@@ -56,5 +63,7 @@ class ItemPasswordForm(forms.ModelForm):
         }
 
     def clean_password(self):
+        # password typed by admin may be weak, so it gets slow default hasher
+        # instead of item hasher meant for generated passwords
         password = self.cleaned_data.get('password')
         return make_password(password)
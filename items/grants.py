@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core import signing
+
+
+def _get_signer(item):
+    # grants are bound to password hash so changing it revokes them
+    return signing.Signer(salt=f'items.grant:{item.password}')
+
+
+def get_grant_expiry(item):
+    return min(
+        datetime.now() + settings.ITEMS_GRANT_LIFETIME,
+        item.expires_at,
+    )
+
+
+def make_grant(item):
+    expiry = int(get_grant_expiry(item).timestamp())
+    return _get_signer(item).sign(f'{item.uuid}:{expiry}')
+
+
+def check_grant(grant, item):
+    if not grant:
+        return False
+    try:
+        value = _get_signer(item).unsign(grant)
+    except signing.BadSignature:
+        return False
+    uuid, expiry = value.rsplit(':', 1)
+    return (
+        uuid == str(item.uuid) and
+        int(expiry) > datetime.now().timestamp()
+    )
+
+
+def get_request_grant(request):
+    return (
+        request.GET.get('grant') or
+        request.COOKIES.get(settings.ITEMS_GRANT_COOKIE_NAME)
+    )
+
+
+def set_grant(response, request, item):
+    grant = make_grant(item)
+    max_age = (get_grant_expiry(item) - datetime.now()).total_seconds()
+    response['X-Item-Grant'] = grant
+    response.set_cookie(
+        settings.ITEMS_GRANT_COOKIE_NAME, grant,
+        max_age=max(int(max_age), 0), path=request.path,
+        secure=request.is_secure(), httponly=True, samesite='Lax',
+    )
+    return response
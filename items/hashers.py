@@ -0,0 +1,86 @@
+import hashlib
+import hmac
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    BasePasswordHasher,
+    check_password,
+    identify_hasher,
+    make_password,
+    mask_hash,
+)
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+from core.metrics import timed
+
+
+# Single keyed SHA256 round, suitable for generated item passwords only as
+# they have enough entropy on their own. Cracking leaked hashes requires
+# ITEMS_PASSWORD_SECRET as well.
+class HMACSHA256PasswordHasher(BasePasswordHasher):
+    algorithm = 'hmac_sha256'
+
+    def encode(self, password, salt):
+        assert password is not None
+        assert salt and '$' not in salt
+        digest = hmac.new(
+            settings.ITEMS_PASSWORD_SECRET.encode(),
+            f'{salt}${password}'.encode(),
+            hashlib.sha256,
+        ).hexdigest()
+        return f'{self.algorithm}${salt}${digest}'
+
+    def verify(self, password, encoded):
+        algorithm, salt, digest = encoded.split('$', 2)
+        assert algorithm == self.algorithm
+        return constant_time_compare(encoded, self.encode(password, salt))
+
+    def safe_summary(self, encoded):
+        algorithm, salt, digest = encoded.split('$', 2)
+        assert algorithm == self.algorithm
+        return OrderedDict([
+            (_('algorithm'), algorithm),
+            (_('salt'), mask_hash(salt, show=2)),
+            (_('hash'), mask_hash(digest)),
+        ])
+
+    def harden_runtime(self, password, encoded):
+        pass
+
+
+def make_item_password(password):
+    return make_password(password, hasher=settings.ITEMS_PASSWORD_HASHER)
+
+
+def _get_preferred_hasher(encoded):
+    # passwords chosen by people (set in admin) are hashed by slow default
+    # hasher and never rehashed with fast item hasher, slow hashes of
+    # generated passwords made before item hasher are gone with their items
+    # after ITEMS_MAX_LIFETIME
+    try:
+        algorithm = identify_hasher(encoded).algorithm
+    except ValueError:
+        return settings.ITEMS_PASSWORD_HASHER
+    if algorithm == settings.ITEMS_PASSWORD_HASHER:
+        return algorithm
+    return 'default'
+
+
+def check_item_password(password, item):
+    preferred = _get_preferred_hasher(item.password)
+
+    def setter(raw_password):
+        # transparently rehash passwords made by outdated hasher
+        item.password = make_password(raw_password, hasher=preferred)
+        type(item).all_objects.filter(pk=item.pk).update(
+            password=item.password,
+        )
+        type(item).uncache(item.uuid)
+
+    with timed('password'):
+        return check_password(
+            password, item.password, setter,
+            preferred=preferred,
+        )
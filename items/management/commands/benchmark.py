@@ -0,0 +1,187 @@
+import json
+import random
+from uuid import uuid4
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core.benchmark import benchmark_database, count_queries, measure
+from core.factories import UserFactory
+from items.factories import ItemFactory
+from items.hashers import make_item_password
+from items.models import Item, private_storage
+
+PASSWORD = 'benchmark'
+
+
+def get_unique_content():
+    # blobs of content addressed storage are never shared with real files
+    return uuid4().hex.encode() * 224
+
+
+class Command(BaseCommand):
+    help = (
+        'Times core endpoints on seeded data in a throwaway test database '
+        'and prints results as JSON, optionally compared with baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--output', help='File to store results in.')
+        parser.add_argument(
+            '--baseline', help='File with results of previous run.',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Allowed slowdown against baseline, 0.2 means 20%%.',
+        )
+
+    def handle(self, *args, **options):
+        # rows (including stats rollup) live only in throwaway database,
+        # files are stored in real storage under names unique to this run
+        with benchmark_database():
+            try:
+                self._seed(options['items'], options['users'])
+                results = {
+                    name: self._measure(func, options['repeat'])
+                    for name, func in self._get_scenarios()
+                }
+            finally:
+                for name in set(Item.all_objects.exclude(file='').exclude(
+                        file__isnull=True).values_list('file', flat=True)):
+                    private_storage.delete(name)
+
+        report = {
+            'items': options['items'],
+            'users': options['users'],
+            'repeat': options['repeat'],
+            'results': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)['results']
+            self._compare(results, baseline, options['tolerance'])
+
+    def _seed(self, items_count, users_count):
+        users = UserFactory.create_batch(users_count)
+        self.user = users[0]
+        self.admin = UserFactory(is_staff=True, is_superuser=True)
+        password = make_item_password(PASSWORD)
+        file_name = private_storage.save(
+            'benchmark.txt', ContentFile(get_unique_content()),
+        )
+        Item.all_objects.bulk_create(
+            ItemFactory.build(
+                user=random.choice(users),
+                password=password,
+                url=None if index % 3 else 'http://kodziek.pl',
+                file=file_name if index % 3 else None,
+                visit_count=index % 4,
+            )
+            for index in range(items_count)
+        )
+        self.link_item = ItemFactory(
+            user=self.user, password=password, url='http://kodziek.pl',
+        )
+        self.file_item = ItemFactory(
+            user=self.user, password=password,
+            file=SimpleUploadedFile('file', get_unique_content()),
+        )
+
+    def _get_scenarios(self):
+        token = Token.objects.create(user=self.user)
+        api_client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        admin_client = Client()
+        admin_client.force_login(self.admin)
+
+        def get_item_url(item, name='item-detail'):
+            return reverse(name, kwargs={'uuid': item.uuid})
+
+        def request(client, method, url, data=None, status=200):
+            # anonymous requests do not reuse grant cookie of previous ones
+            client = client or Client()
+            response = getattr(client, method)(url, data)
+            assert response.status_code == status, response.status_code
+            if response.streaming:
+                b''.join(response.streaming_content)
+            response.close()
+
+        return (
+            ('create_url', lambda: request(
+                api_client, 'post', reverse('item-list'),
+                {'url': 'http://kodziek.pl'}, status=201,
+            )),
+            ('create_file', lambda: request(
+                api_client, 'post', reverse('item-list'),
+                {'file': SimpleUploadedFile('file', get_unique_content())},
+                status=201,
+            )),
+            ('retrieve_link', lambda: request(
+                None, 'get',
+                f'{get_item_url(self.link_item)}?password={PASSWORD}',
+                status=302,
+            )),
+            ('retrieve_file', lambda: request(
+                None, 'get',
+                f'{get_item_url(self.file_item)}?password={PASSWORD}',
+            )),
+            ('html_get_form', lambda: request(
+                None, 'get',
+                get_item_url(self.link_item, 'items:get'),
+            )),
+            ('html_get_submit', lambda: request(
+                None, 'post',
+                get_item_url(self.link_item, 'items:get'),
+                {'password': PASSWORD}, status=302,
+            )),
+            ('stats', lambda: request(
+                api_client, 'get', reverse('stats-list'),
+            )),
+            ('admin_changelist', lambda: request(
+                admin_client, 'get', reverse('admin:items_item_changelist'),
+            )),
+        )
+
+    def _measure(self, func, repeat):
+        # first run warms up caches and lazy imports
+        func()
+        queries = count_queries(func)
+        stats = measure(func, repeat)
+        return {
+            'best_ms': round(stats['best'] * 1000, 3),
+            'mean_ms': round(stats['mean'] * 1000, 3),
+            'peak_memory': stats['peak_memory'],
+            'queries': queries,
+        }
+
+    def _compare(self, results, baseline, tolerance):
+        regressions = []
+        for name, stats in results.items():
+            if name not in baseline:
+                continue
+            ratio = stats['best_ms'] / baseline[name]['best_ms']
+            self.stderr.write(
+                f'{name:>16}: {ratio:.2f}x baseline time, '
+                f'{stats["queries"]} queries '
+                f'(baseline {baseline[name]["queries"]})',
+            )
+            if ratio > 1 + tolerance:
+                regressions.append(f'{name} is {ratio:.2f}x slower')
+            if stats['queries'] > baseline[name]['queries']:
+                regressions.append(f'{name} makes more queries')
+        if regressions:
+            raise CommandError(
+                f'Regressions against baseline: {", ".join(regressions)}.',
+            )
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core.benchmark import benchmark_database, measure
+from core.factories import UserFactory
+from items.models import Item
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares latency of creating N link items with N requests to item '
+        'API and with single bulk request in a throwaway test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--counts', type=int, nargs='+', default=[1, 100, 1000],
+        )
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            token = Token.objects.create(user=UserFactory())
+            self.client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+            for count in options['counts']:
+                single = measure(
+                    lambda: self._single(count), options['repeat'],
+                )
+                bulk = measure(lambda: self._bulk(count), options['repeat'])
+                self.stdout.write(
+                    f'N={count:>5}: {single["best"] * 1000:.1f} ms single '
+                    f'requests, {bulk["best"] * 1000:.1f} ms bulk request '
+                    f'({single["best"] / bulk["best"]:.1f}x)',
+                )
+                Item.all_objects.all().delete()
+
+    def _single(self, count):
+        for index in range(count):
+            response = self.client.post(
+                reverse('item-list'), {'url': f'http://kodziek.pl/{index}'},
+            )
+            assert response.status_code == 201, response.content
+
+    def _bulk(self, count):
+        response = self.client.post(
+            reverse('item-bulk'),
+            [{'url': f'http://kodziek.pl/{index}'} for index in range(count)],
+            content_type='application/json',
+        )
+        assert response.status_code == 201, response.content
@@ -0,0 +1,103 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from core.benchmark import measure
+from items.delivery import iter_decompressed
+from items.storage import CompressedFileSystemStorage
+
+MB = 1024 * 1024
+
+
+def generate_json(size):
+    records = []
+    while len(records) * 60 < size:
+        records.append({
+            'id': len(records),
+            'name': random.choice(['alpha', 'beta', 'gamma', 'delta']),
+            'value': round(random.random() * 1000, 2),
+            'active': random.random() < 0.5,
+        })
+    return json.dumps(records).encode()[:size]
+
+
+def generate_log(size):
+    lines = []
+    length = 0
+    while length < size:
+        line = (
+            f'2017-10-25 12:{random.randrange(60):02d}:'
+            f'{random.randrange(60):02d} '
+            f'{random.choice(["INFO", "WARNING", "ERROR"])} '
+            f'request {random.randrange(10 ** 6)} served in '
+            f'{random.randrange(1000)} ms\n'
+        )
+        lines.append(line)
+        length += len(line)
+    return ''.join(lines).encode()[:size]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures disk savings and CPU cost of compressing item files at '
+        'rest and decompressing them on download.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=16, help='In MB.')
+        parser.add_argument('--level', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        size = options['size'] * MB
+        samples = (
+            ('file.json', generate_json(size)),
+            ('file.log', generate_log(size)),
+            ('file.bin', os.urandom(size)),
+        )
+        location = tempfile.mkdtemp()
+        raw_storage = FileSystemStorage(location=location)
+        compressed_storage = CompressedFileSystemStorage(location=location)
+        try:
+            with override_settings(
+                    ITEMS_FILE_COMPRESSION_LEVEL=options['level']):
+                for name, content in samples:
+                    self._benchmark(
+                        name, content, raw_storage, compressed_storage,
+                        options['repeat'],
+                    )
+        finally:
+            shutil.rmtree(location)
+
+    def _benchmark(self, name, content, raw_storage, compressed_storage,
+                   repeat):
+        raw = measure(
+            lambda: raw_storage.save(name, ContentFile(content)), repeat,
+        )
+        compressed = measure(
+            lambda: compressed_storage.save(name, ContentFile(content)),
+            repeat,
+        )
+        stored_name = compressed['result']
+        decompressed = measure(
+            lambda: sum(map(len, iter_decompressed(
+                compressed_storage.open(stored_name),
+            ))),
+            repeat,
+        )
+        stored_size = compressed_storage.size(stored_name)
+        megabytes = len(content) / MB
+        self.stdout.write(
+            f'{name:>9}: {stored_size / MB:.2f} of {megabytes:.2f} MB on '
+            f'disk ({1 - stored_size / len(content):.0%} saved), save '
+            f'{megabytes / raw["best"]:.0f} MB/s raw vs '
+            f'{megabytes / compressed["best"]:.0f} MB/s compressed, '
+            f'decompression {megabytes / decompressed["best"]:.0f} MB/s',
+        )
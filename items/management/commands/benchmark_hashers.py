@@ -0,0 +1,32 @@
+import time
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+
+from core.helpers import generate_random_password
+
+
+class Command(BaseCommand):
+    help = 'Measures password checks per second on a single core.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hashers', nargs='+', default=['pbkdf2_sha256', 'hmac_sha256'],
+        )
+        parser.add_argument(
+            '--duration', type=float, default=2, help='Seconds per hasher.',
+        )
+
+    def handle(self, *args, **options):
+        password = generate_random_password()
+        for algorithm in options['hashers']:
+            encoded = make_password(password, hasher=algorithm)
+            checks = 0
+            start = time.perf_counter()
+            while time.perf_counter() - start < options['duration']:
+                check_password(password, encoded, preferred=algorithm)
+                checks += 1
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{algorithm:>16}: {checks / elapsed:.0f} checks/s per core',
+            )
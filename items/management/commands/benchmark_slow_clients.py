@@ -0,0 +1,162 @@
+import http.client
+import socket
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.core.files.base import ContentFile
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import reverse
+
+from core.benchmark import benchmark_database
+from core.factories import UserFactory
+from items.factories import ItemFactory
+from items.grants import make_grant
+
+MB = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+RECEIVE_BUFFER = 128 * 1024
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+# Handles requests by fixed pool of threads like gunicorn gthread worker,
+# single thread behaves like sync worker.
+class PooledWSGIServer(WSGIServer):
+    def __init__(self, *args, threads, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown()
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures how many slow clients downloading large file are served '
+        'concurrently by single threaded (sync) and thread pool (gthread) '
+        'server and how long fast request waits behind them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=8)
+        parser.add_argument(
+            '--threads', type=int, nargs='+', default=[1, 8, 16],
+            help='Server thread counts to compare, 1 is sync worker.',
+        )
+        parser.add_argument('--size', type=int, default=16, help='In MB.')
+        parser.add_argument(
+            '--rate', type=float, default=16,
+            help='Download rate of slow client in MB/s.',
+        )
+
+    def handle(self, *args, **options):
+        with benchmark_database(), override_settings(ALLOWED_HOSTS=['*']):
+            user = UserFactory()
+            large_item = ItemFactory(
+                user=user,
+                file=ContentFile(b'x' * options['size'] * MB, name='file'),
+            )
+            small_item = ItemFactory(user=user, url='http://kodziek.pl')
+            self.large_path = self._get_path(large_item)
+            self.small_path = self._get_path(small_item)
+            try:
+                for threads in options['threads']:
+                    self._benchmark(
+                        threads, options['clients'], options['rate'] * MB,
+                    )
+            finally:
+                large_item.file.delete()
+
+    def _get_path(self, item):
+        # grant skips password check and visit counting, so clients only read
+        url = reverse('item-detail', kwargs={'uuid': item.uuid})
+        return f'{url}?grant={make_grant(item)}'
+
+    def _benchmark(self, threads, clients, rate):
+        server = make_server(
+            '127.0.0.1', 0, WSGIHandler(),
+            server_class=partial(PooledWSGIServer, threads=threads),
+            handler_class=QuietRequestHandler,
+        )
+        port = server.server_port
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=clients) as executor:
+                downloads = [
+                    executor.submit(self._download_slowly, port, rate)
+                    for _ in range(clients)
+                ]
+                time.sleep(0.2)
+                probe = self._request(port, self.small_path)
+                durations = [download.result() for download in downloads]
+            elapsed = time.perf_counter() - start
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.stdout.write(
+            f'{threads:>3} threads: {clients} slow downloads finished in '
+            f'{elapsed:.2f} s (median {statistics.median(durations):.2f} s '
+            f'each), fast request waited {probe:.2f} s',
+        )
+
+    def _connect(self, port):
+        # small receive window keeps file from being buffered by loopback,
+        # so server has to wait for slow client like for real one
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+        sock.connect(('127.0.0.1', port))
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        connection.sock = sock
+        return connection
+
+    def _request(self, port, path):
+        start = time.perf_counter()
+        connection = self._connect(port)
+        connection.request('GET', path)
+        connection.getresponse().read()
+        connection.close()
+        return time.perf_counter() - start
+
+    def _download_slowly(self, port, rate):
+        start = time.perf_counter()
+        connection = self._connect(port)
+        connection.request('GET', self.large_path)
+        response = connection.getresponse()
+        assert response.status == 200, response.status
+        # client reads at its own pace since first byte, time spent waiting
+        # for busy server is not caught up
+        first_byte = time.perf_counter()
+        received = 0
+        while True:
+            chunk = response.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            received += len(chunk)
+            delay = first_byte + received / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        connection.close()
+        return time.perf_counter() - start
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from core.benchmark import benchmark_database, measure
+from core.factories import UserFactory
+from items.models import Item, ItemDailyStats
+
+
+def legacy_format_response(queryset):
+    response = {}
+    for item in queryset:
+        create_date = item.create_date.strftime('%Y-%m-%d')
+        if create_date not in response:
+            response[create_date] = {
+                'files': 0,
+                'links': 0,
+            }
+        response[create_date]['links' if item.url else 'files'] += 1
+    return response
+
+
+def grouped_format_response(queryset):
+    # rows are grouped by date and user
+    response = {}
+    for row in ItemDailyStats.aggregate(queryset):
+        stats = response.setdefault(
+            row['date'].strftime('%Y-%m-%d'), {'files': 0, 'links': 0},
+        )
+        stats['files'] += row['files']
+        stats['links'] += row['links']
+    return response
+
+
+def rollup_format_response(queryset):
+    return {
+        row['bucket'].strftime('%Y-%m-%d'): {
+            'files': row['files'],
+            'links': row['links'],
+        }
+        for row in ItemDailyStats.group(queryset)
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares in-Python aggregation, grouped SQL aggregation and daily '
+        'stats rollup reads of the stats endpoint on a generated dataset '
+        'stored in a throwaway test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100000)
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            self._seed(
+                options['items'], options['days'], options['batch_size'],
+            )
+            self._run(options['repeat'])
+
+    def _seed(self, items_count, days, batch_size):
+        user = UserFactory()
+        per_day = max(items_count // days, 1)
+        start = datetime.now() - timedelta(days=days)
+        created = 0
+        for day in range(days):
+            count = min(per_day, items_count - created)
+            if count <= 0:
+                break
+            last_pk = Item.all_objects.order_by('-pk').values_list(
+                'pk', flat=True,
+            ).first() or 0
+            Item.all_objects.bulk_create(
+                (
+                    Item(
+                        user=user,
+                        password='benchmark',
+                        url='http://kodziek.pl' if i % 3 else None,
+                        file='' if i % 3 else 'file',
+                        visit_count=i % 4,
+                    )
+                    for i in range(count)
+                ),
+                batch_size=batch_size,
+            )
+            Item.all_objects.filter(pk__gt=last_pk).update(
+                create_date=start + timedelta(days=day),
+            )
+            created += count
+        self.stdout.write(f'Seeded {created} items over {days} days.')
+
+    def _run(self, repeat):
+        items = Item.all_objects.filter(visit_count__gt=0)
+        call_command('rebuild_item_stats', '--all', stdout=self.stdout)
+        paths = (
+            ('python', lambda: legacy_format_response(items.all())),
+            ('sql', lambda: grouped_format_response(items.all())),
+            ('rollup', lambda: rollup_format_response(
+                ItemDailyStats.objects.all(),
+            )),
+        )
+        results = [(name, measure(func, repeat)) for name, func in paths]
+        if len({str(stats['result']) for _, stats in results}) != 1:
+            self.stderr.write('Results of compared paths differ.')
+
+        for name, stats in results:
+            self.stdout.write(
+                f'{name:>6}: best {stats["best"] * 1000:.1f} ms, '
+                f'mean {stats["mean"] * 1000:.1f} ms, '
+                f'peak memory {stats["peak_memory"] / 1024:.0f} KiB',
+            )
@@ -0,0 +1,74 @@
+import json
+import os
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core.benchmark import benchmark_database
+from core.factories import UserFactory
+from items.models import Item
+
+MB = 1024 * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares throughput of multipart item upload with chunked upload '
+        'API in a throwaway test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=64, help='In MB.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=8, help='In MB.',
+        )
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        content = os.urandom(options['size'] * MB)
+        with benchmark_database():
+            token = Token.objects.create(user=UserFactory())
+            self.client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+            for name, upload in (
+                    ('multipart', self._multipart),
+                    ('chunked', self._chunked),
+            ):
+                timings = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    upload(content, options['chunk_size'] * MB)
+                    timings.append(time.perf_counter() - start)
+                best = min(timings)
+                self.stdout.write(
+                    f'{name:>9}: {len(content) / MB / best:.1f} MB/s '
+                    f'(best of {options["repeat"]}: {best:.2f} s)',
+                )
+            for item in Item.all_objects.all():
+                item.file.delete()
+
+    def _multipart(self, content, chunk_size):
+        response = self.client.post(
+            reverse('item-list'),
+            {'file': SimpleUploadedFile('file', content)},
+        )
+        assert response.status_code == 201, response.content
+
+    def _chunked(self, content, chunk_size):
+        response = self.client.post(
+            reverse('upload-list'), {'name': 'file', 'size': len(content)},
+        )
+        upload_uuid = json.loads(response.content)['uuid']
+        upload_url = reverse('upload-detail', kwargs={'uuid': upload_uuid})
+        for offset in range(0, len(content), chunk_size):
+            response = self.client.put(
+                f'{upload_url}?offset={offset}',
+                content[offset:offset + chunk_size],
+                content_type='application/octet-stream',
+            )
+            assert response.status_code == 200, response.content
+        response = self.client.post(f'{upload_url}finalize/')
+        assert response.status_code == 201, response.content
@@ -0,0 +1,72 @@
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from core.benchmark import benchmark_database
+from core.factories import UserFactory
+from items.models import Item, visit_count_buffer
+
+COUNTERS = ('locking', 'atomic', 'buffered')
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures visit counting throughput of each ITEMS_VISIT_COUNTER mode '
+        'in a throwaway test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10)
+        parser.add_argument('--visits', type=int, default=10000)
+        parser.add_argument(
+            '--threads', type=int, default=1,
+            help='Concurrent visitors, use more than one on PostgreSQL.',
+        )
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            user = UserFactory()
+            pks = [
+                Item.all_objects.create(user=user, password='benchmark').pk
+                for _ in range(options['items'])
+            ]
+            for counter in COUNTERS:
+                elapsed = self._run(
+                    counter, pks, options['visits'], options['threads'],
+                )
+                self.stdout.write(
+                    f'{counter:>8}: {options["visits"] / elapsed:.0f} '
+                    f'visits/s ({elapsed:.2f} s)',
+                )
+
+    def _run(self, counter, pks, visits, threads_count):
+        per_thread = visits // threads_count
+
+        def visit():
+            try:
+                for _ in range(per_thread):
+                    Item.increment_visit_count(random.choice(pks))
+            finally:
+                if threading.current_thread() is not main_thread:
+                    connection.close()
+
+        main_thread = threading.current_thread()
+        with override_settings(ITEMS_VISIT_COUNTER=counter):
+            start = time.perf_counter()
+            if threads_count == 1:
+                visit()
+            else:
+                threads = [
+                    threading.Thread(target=visit)
+                    for _ in range(threads_count)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            visit_count_buffer.flush()
+            return time.perf_counter() - start
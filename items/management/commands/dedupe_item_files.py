@@ -0,0 +1,98 @@
+import os
+from itertools import chain
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from items.models import Item, lock_private_files, private_storage
+from items.storage import (
+    BLOBS_DIR, COMPRESSED_DIR, get_blob_name, hash_file, is_blob_name,
+)
+
+BLOB_DIRS = (BLOBS_DIR, f'{COMPRESSED_DIR}/{BLOBS_DIR}')
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves files of items into content addressed blobs so identical '
+        'files are stored once. With --sweep it also deletes blobs no item '
+        'refers to.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--sweep', action='store_true')
+
+    def handle(self, *args, **options):
+        moved, deduplicated, missing = self._dedupe(options['batch_size'])
+        self.stdout.write(
+            f'Moved {moved} files into blobs, deleted {deduplicated} '
+            f'duplicates, {missing} missing.',
+        )
+        if options['sweep']:
+            self.stdout.write(f'Swept {self._sweep()} orphaned blobs.')
+
+    def _dedupe(self, batch_size):
+        moved = deduplicated = missing = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                Item.all_objects
+                .filter(pk__gt=last_pk, file__isnull=False)
+                .exclude(file='')
+                .exclude(
+                    Q(file__startswith=f'{BLOB_DIRS[0]}/') |
+                    Q(file__startswith=f'{BLOB_DIRS[1]}/')
+                )
+                .order_by('pk')
+                .values_list('pk', 'file')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            for name in {name for _, name in batch}:
+                if not private_storage.exists(name):
+                    missing += 1
+                    continue
+                with private_storage.open(name) as file:
+                    blob_name = get_blob_name(hash_file(file), name)
+                blob_path = private_storage.path(blob_name)
+                # existing blob cannot be purged before rows refer to it
+                with lock_private_files():
+                    if os.path.exists(blob_path):
+                        deduplicated += 1
+                    else:
+                        os.makedirs(
+                            os.path.dirname(blob_path), exist_ok=True,
+                        )
+                        os.replace(private_storage.path(name), blob_path)
+                        moved += 1
+                    # row points to blob before original is deleted, so
+                    # reads of item never miss its file
+                    Item.all_objects.filter(file=name).update(file=blob_name)
+                private_storage.delete(name)
+        return moved, deduplicated, missing
+
+    def _sweep(self):
+        swept = 0
+        for root, _, files in chain.from_iterable(
+                os.walk(private_storage.path(blob_dir))
+                for blob_dir in BLOB_DIRS
+        ):
+            names = {
+                os.path.relpath(
+                    os.path.join(root, file), private_storage.location,
+                ).replace(os.sep, '/')
+                for file in files
+            }
+            names = {name for name in names if is_blob_name(name)}
+            with lock_private_files(exclusive=True):
+                names -= set(
+                    Item.all_objects.filter(file__in=names).values_list(
+                        'file', flat=True,
+                    )
+                )
+                for name in names:
+                    private_storage.delete(name)
+            swept += len(names)
+        return swept
@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from items.models import Item, Upload
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes expired items and their files and stale chunked uploads in '
+        'small batches. With --loop it keeps running as periodic worker.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--pause', type=float, default=0.1,
+            help='Seconds to wait between batches.',
+        )
+        parser.add_argument('--loop', action='store_true')
+        parser.add_argument(
+            '--interval', type=float, default=300,
+            help='Seconds to wait between purges with --loop.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                self._purge(options['batch_size'], options['pause'])
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def _purge(self, batch_size, pause):
+        start = time.perf_counter()
+        totals = [0, 0, 0]
+        while True:
+            batch = Item.delete_expired(batch_size)
+            if not batch[0]:
+                break
+            totals = [total + count for total, count in zip(totals, batch)]
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'Deleted {batch[0]} items ({batch[1]} files, {batch[2]} '
+                f'missing), {totals[0]} in total, '
+                f'{totals[0] / elapsed:.0f} items/s.',
+            )
+            if batch[0] < batch_size:
+                break
+            time.sleep(pause)
+
+        uploads = 0
+        while True:
+            batch = Upload.delete_stale(batch_size)
+            uploads += batch
+            if batch < batch_size:
+                break
+            time.sleep(pause)
+
+        self.stdout.write(
+            f'Purged {totals[0]} items, {totals[1]} files ({totals[2]} '
+            f'missing) and {uploads} stale uploads in '
+            f'{time.perf_counter() - start:.2f} s.',
+        )
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from items.models import Item, ItemDailyStats, ItemPurgeMark
+
+
+class Command(BaseCommand):
+    help = (
+        'Backfills daily item stats from existing items and reconciles '
+        'rows which drifted from them. By default only days after the '
+        'newest purged item are reconciled.'
+    )
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument(
+            '--since', help='First day (YYYY-MM-DD) to reconcile.',
+        )
+        group.add_argument(
+            '--all', action='store_true',
+            help='Reconcile all days, use only before purging items.',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            items = Item.all_objects.all()
+            stats = ItemDailyStats.objects.select_for_update()
+            # lock keeps purge from deleting items until stats are rebuilt,
+            # days until the newest purged item miss some of their items
+            purged_until = ItemPurgeMark.get(lock=True)
+            since = options['since']
+            if not since and not options['all'] and purged_until:
+                since = purged_until.date() + timedelta(days=1)
+            if since:
+                items = items.filter(create_date__date__gte=since)
+                stats = stats.filter(date__gte=since)
+
+            existing = {(row.date, row.user_id): row for row in stats}
+            to_create = []
+            to_update = []
+            for row in ItemDailyStats.aggregate(items):
+                current = existing.pop((row['date'], row['user_id']), None)
+                if current is None:
+                    to_create.append(ItemDailyStats(**row))
+                elif (current.files, current.links) != (
+                        row['files'], row['links']
+                ):
+                    current.files = row['files']
+                    current.links = row['links']
+                    to_update.append(current)
+
+            ItemDailyStats.objects.bulk_create(to_create)
+            ItemDailyStats.objects.bulk_update(to_update, ('files', 'links'))
+            ItemDailyStats.objects.filter(
+                pk__in=[row.pk for row in existing.values()],
+            ).delete()
+            ItemDailyStats.changed()
+
+        self.stdout.write(
+            f'Created {len(to_create)}, updated {len(to_update)} and '
+            f'deleted {len(existing)} daily stats.',
+        )
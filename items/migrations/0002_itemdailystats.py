@@ -0,0 +1,26 @@
+# Generated by Django 2.2.28 on 2026-10-18 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemDailyStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('files', models.PositiveIntegerField(default=0)),
+                ('links', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'item daily stats',
+                'ordering': ('date',),
+            },
+        ),
+    ]
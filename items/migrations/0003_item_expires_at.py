@@ -0,0 +1,43 @@
+# Generated by Django 2.2.28 on 2026-10-18 11:44
+
+from datetime import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+import items.models
+
+BATCH_SIZE = 10000
+
+
+def backfill_expires_at(apps, schema_editor):
+    Item = apps.get_model('items', 'Item')
+    now = datetime.now()
+    lifetime = now + settings.ITEMS_LIFETIME - now
+    last_pk = Item.objects.order_by('-pk').values_list('pk', flat=True).first()
+    for start in range(0, (last_pk or 0) + 1, BATCH_SIZE):
+        Item.objects.filter(
+            pk__gte=start, pk__lt=start + BATCH_SIZE,
+        ).update(expires_at=F('create_date') + lifetime)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0002_itemdailystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='expires_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_expires_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='item',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, default=items.models.get_expires_at, editable=False),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 2.2.28 on 2026-10-18 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0004_upload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='item',
+            name='file',
+            field=models.FileField(
+                blank=True, db_index=True, null=True, upload_to='',
+            ),
+        ),
+    ]
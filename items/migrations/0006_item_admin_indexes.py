@@ -0,0 +1,22 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0005_item_file_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='item',
+            name='create_date',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['user', 'id'], name='item_user_id_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('items', '0006_item_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemdailystats',
+            name='user',
+            field=models.ForeignKey(
+                blank=True, null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name='itemdailystats',
+            name='date',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AddConstraint(
+            model_name='itemdailystats',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'date'), name='item_daily_stats_user_date',
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:29
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+import django.db.models.deletion
+
+
+def fold_shared_stats(apps, schema_editor):
+    # rows without user were not unique by date, duplicates are summed up
+    # into the first of them
+    ItemDailyStats = apps.get_model('items', 'ItemDailyStats')
+    shared = ItemDailyStats.objects.filter(user__isnull=True)
+    duplicated = (
+        shared
+        .values('date')
+        .annotate(
+            rows=Count('pk'), first_pk=Min('pk'),
+            total_files=Sum('files'), total_links=Sum('links'),
+        )
+        .filter(rows__gt=1)
+    )
+    for row in duplicated:
+        shared.filter(pk=row['first_pk']).update(
+            files=row['total_files'], links=row['total_links'],
+        )
+        shared.filter(date=row['date']).exclude(pk=row['first_pk']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0007_item_daily_stats_user'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='itemdailystats',
+            name='user',
+            field=models.ForeignKey(
+                blank=True, null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(fold_shared_stats, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='itemdailystats',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(user__isnull=True), fields=('date',),
+                name='item_daily_stats_shared_date',
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.28 on 2026-10-18 14:02
+
+from datetime import datetime
+
+from django.db import migrations, models
+
+
+def create_mark(apps, schema_editor):
+    # items purged before are unknown, so any of them might have been
+    # created right before the migration
+    ItemPurgeMark = apps.get_model('items', 'ItemPurgeMark')
+    ItemPurgeMark.objects.using(schema_editor.connection.alias).create(
+        pk=1, create_date=datetime.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0008_item_daily_stats_shared_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemPurgeMark',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('create_date', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(create_mark, migrations.RunPython.noop),
+    ]
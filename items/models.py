@@ -1,41 +1,449 @@
+import os
+import shutil
 import uuid
+from collections import defaultdict
 from datetime import datetime
 
 from django.conf import settings
-from django.core.files.storage import FileSystemStorage
-from django.db import models, transaction
+from django.core.files import File
+from django.core.exceptions import ValidationError
+from django.core.files.storage import get_storage_class
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import Trunc, TruncDate
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
 
-private_storage = FileSystemStorage(
-    location=f'{settings.BASE_DIR}{settings.PRIVATE_MEDIA}',
+from core.buffers import WriteBehindBuffer
+from core.caches import LRUCache
+from core.metrics import timed
+from items.storage import lock_files
+
+private_storage = get_storage_class(settings.ITEMS_FILE_STORAGE)(
+    location=settings.PRIVATE_MEDIA_ROOT,
+)
+# immutable fields of items by uuid, visit_count is always read from database
+item_cache = LRUCache(
+    max_size=settings.ITEMS_CACHE_MAX_SIZE, ttl=settings.ITEMS_CACHE_TTL,
+)
+# stats responses by rollup version and query
+stats_cache = LRUCache(
+    max_size=settings.ITEMS_STATS_CACHE_MAX_SIZE,
+    ttl=settings.ITEMS_STATS_CACHE_TTL,
 )
+# in order of model fields as expected by Item.from_db
+CACHED_ITEM_FIELDS = (
+    'id', 'create_date', 'expires_at', 'uuid', 'password', 'url', 'file',
+)
+
+
+def lock_private_files(exclusive=False):
+    return lock_files(private_storage.location, exclusive)
+
+
+def get_expires_at(lifetime=None):
+    return datetime.now() + (lifetime or settings.ITEMS_LIFETIME)
 
 
 class ItemManager(models.Manager):
     def get_queryset(self):
-        timedelta = datetime.now() - settings.ITEMS_LIFETIME
-        return super().get_queryset().filter(create_date__gt=timedelta)
+        return super().get_queryset().filter(expires_at__gt=datetime.now())
 
 
 class Item(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.PROTECT,
     )
-    create_date = models.DateTimeField(auto_now_add=True, editable=False)
+    create_date = models.DateTimeField(
+        auto_now_add=True, editable=False, db_index=True,
+    )
+    expires_at = models.DateTimeField(
+        default=get_expires_at, editable=False, db_index=True,
+    )
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     password = models.CharField(max_length=128)
     url = models.TextField(null=True, blank=True)
-    file = models.FileField(null=True, blank=True, storage=private_storage)
+    file = models.FileField(
+        null=True, blank=True, storage=private_storage, db_index=True,
+    )
     visit_count = models.PositiveIntegerField(default=0)
 
     objects = ItemManager()
     all_objects = models.Manager()
 
+    class Meta:
+        # admin filters items of user and pages them by descending id
+        indexes = [
+            models.Index(fields=['user', 'id'], name='item_user_id_idx'),
+        ]
+
     def __str__(self):
         return self.url or str(self.file)
 
+    def save(self, *args, **kwargs):
+        if self.file and not self.file._committed:
+            # row is committed before purge can check references of file
+            with lock_private_files():
+                super().save(*args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
+        self.uncache(self.uuid)
+
+    @classmethod
+    def get_cached(cls, uuid):
+        with timed('item_lookup'):
+            return cls._get_cached(uuid)
+
+    @classmethod
+    def _get_cached(cls, uuid):
+        key = str(uuid)
+        values = item_cache.get(key)
+        if values is None:
+            try:
+                values = (
+                    cls.objects
+                    .filter(uuid=key)
+                    .values_list(*CACHED_ITEM_FIELDS)
+                    .get()
+                )
+            except (ValidationError, ValueError):
+                raise cls.DoesNotExist
+            # entry never outlives the item itself
+            expires_at = values[CACHED_ITEM_FIELDS.index('expires_at')]
+            remaining = (expires_at - datetime.now()).total_seconds()
+            item_cache.set(key, values, ttl=min(
+                settings.ITEMS_CACHE_TTL, remaining,
+            ))
+        elif values[CACHED_ITEM_FIELDS.index('expires_at')] <= datetime.now():
+            # expiry is checked on every hit, not left to cache TTL
+            item_cache.delete(key)
+            raise cls.DoesNotExist
+        # fields which are not cached, e.g. visit_count, are deferred
+        return cls.from_db('default', CACHED_ITEM_FIELDS, values)
+
+    @classmethod
+    def uncache(cls, uuid):
+        item_cache.delete(str(uuid))
+
     @classmethod
     def increment_visit_count(cls, pk):
+        with timed('visit_count'):
+            cls._increment_visit_count(pk)
+
+    @classmethod
+    def _increment_visit_count(cls, pk):
+        if settings.ITEMS_VISIT_COUNTER == 'buffered':
+            visit_count_buffer.add(pk, 1)
+        elif settings.ITEMS_VISIT_COUNTER == 'locking':
+            with transaction.atomic():
+                item = cls.objects.select_for_update().get(pk=pk)
+                item.visit_count += 1
+                item.save()
+                if item.visit_count == 1:
+                    ItemDailyStats.increment(
+                        item.create_date.date(), item.user_id, item.is_link,
+                    )
+        else:
+            cls.add_visit_counts({pk: 1})
+
+    @classmethod
+    def add_visit_counts(cls, visit_counts):
+        pks_by_count = defaultdict(list)
+        for pk, count in visit_counts.items():
+            pks_by_count[count].append(pk)
+
+        with transaction.atomic():
+            # only rows still unvisited are locked, hot items are not
+            first_visited = list(
+                cls.all_objects
+                .select_for_update()
+                .filter(pk__in=visit_counts, visit_count=0)
+                .values_list('create_date', 'user_id', 'url')
+            )
+            for count, pks in pks_by_count.items():
+                cls.all_objects.filter(pk__in=pks).update(
+                    visit_count=F('visit_count') + count,
+                )
+            for create_date, user_id, url in first_visited:
+                ItemDailyStats.increment(
+                    create_date.date(), user_id, bool(url),
+                )
+
+    @classmethod
+    def delete_expired(cls, batch_size):
+        batch = list(
+            cls.all_objects
+            .filter(expires_at__lte=datetime.now())
+            .order_by('expires_at')
+            .values_list('pk', 'uuid', 'file', 'create_date')[:batch_size]
+        )
+        if batch:
+            # recorded before rows are gone, so rebuild of stats never
+            # reconciles days which miss purged items
+            ItemPurgeMark.advance(max(row[3] for row in batch))
+        pks = [pk for pk, _, _, _ in batch]
+        # files may be shared by deduplicating storage, so only files which
+        # are not referred to by any other item are deleted
+        files = {name for _, _, name, _ in batch if name}
+        missing_files = 0
+        with lock_private_files(exclusive=True):
+            files -= set(
+                cls.all_objects
+                .filter(file__in=files)
+                .exclude(pk__in=pks)
+                .values_list('file', flat=True)
+            )
+            for name in files:
+                if not private_storage.exists(name):
+                    missing_files += 1
+                private_storage.delete(name)
+
+        # rows are deleted after their files, so interrupted purge leaves
+        # expired rows, which are never served, instead of orphaned files
+        cls.all_objects.filter(pk__in=pks).delete()
+        for _, item_uuid, _, _ in batch:
+            cls.uncache(item_uuid)
+        return len(batch), len(files), missing_files
+
+    @property
+    def is_link(self):
+        return bool(self.url)
+
+
+class ItemPurgeMark(models.Model):
+    # single row (created by migration, so it can always be locked) with the
+    # newest creation date of purged items, days until then are incomplete
+    # and their stats cannot be rebuilt from items
+    create_date = models.DateTimeField()
+
+    @classmethod
+    def advance(cls, create_date):
+        marks = cls.objects.filter(pk=1, create_date__lt=create_date)
+        if not marks.update(create_date=create_date):
+            cls.objects.get_or_create(
+                pk=1, defaults={'create_date': create_date},
+            )
+
+    @classmethod
+    def get(cls, lock=False):
+        marks = cls.objects.select_for_update() if lock else cls.objects
+        return marks.filter(pk=1).values_list(
+            'create_date', flat=True,
+        ).first()
+
+
+class ItemDailyStats(models.Model):
+    GRANULARITIES = ('day', 'week', 'month')
+
+    date = models.DateField(db_index=True)
+    # stats rolled up before they were kept per user and stats of deleted
+    # users (folded by fold_user before user is deleted) have no user
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        null=True, blank=True,
+    )
+    files = models.PositiveIntegerField(default=0)
+    links = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ('date',)
+        verbose_name_plural = 'item daily stats'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'date'), name='item_daily_stats_user_date',
+            ),
+            # NULLs are distinct in the constraint above
+            models.UniqueConstraint(
+                fields=('date',), condition=Q(user__isnull=True),
+                name='item_daily_stats_shared_date',
+            ),
+        ]
+
+    # bumped on every change of rollup made in this process, stats cached
+    # for older versions are never read again
+    version = 0
+
+    def __str__(self):
+        return str(self.date)
+
+    @classmethod
+    def bump_version(cls):
+        cls.version += 1
+
+    @classmethod
+    def changed(cls):
+        # bumped once more on commit, as concurrent requests could cache
+        # stats read before the change was visible
+        cls.bump_version()
+        transaction.on_commit(cls.bump_version)
+
+    @classmethod
+    def increment(cls, date, user_id, is_link):
+        field = 'links' if is_link else 'files'
+        stats = cls.objects.filter(date=date, user_id=user_id)
+        if not stats.update(**{field: F(field) + 1}):
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        date=date, user_id=user_id, **{field: 1},
+                    )
+            except IntegrityError:
+                # row created concurrently by another visit of the same day
+                stats.update(**{field: F(field) + 1})
+        cls.changed()
+
+    @classmethod
+    def fold_user(cls, user_id):
+        # counts of user are kept in stats of all users when user is deleted
         with transaction.atomic():
-            item = cls.objects.select_for_update().get(pk=pk)
-            item.visit_count += 1
-            item.save()
+            rows = list(cls.objects.select_for_update().filter(
+                user_id=user_id,
+            ))
+            for row in rows:
+                shared = cls.objects.filter(date=row.date, user__isnull=True)
+                if not shared.update(
+                        files=F('files') + row.files,
+                        links=F('links') + row.links,
+                ):
+                    cls.objects.create(
+                        date=row.date, files=row.files, links=row.links,
+                    )
+            cls.objects.filter(pk__in=[row.pk for row in rows]).delete()
+            if rows:
+                cls.changed()
+
+    @staticmethod
+    def group(queryset, granularity='day'):
+        # buckets are identified by their first day
+        if granularity == 'day':
+            bucket = F('date')
+        else:
+            bucket = Trunc('date', granularity, output_field=DateField())
+        return (
+            queryset
+            .annotate(bucket=bucket)
+            .values('bucket')
+            .annotate(files=Sum('files'), links=Sum('links'))
+            .order_by('bucket')
+        )
+
+    @staticmethod
+    def aggregate(queryset):
+        is_file = Q(url__isnull=True) | Q(url='')
+        return (
+            queryset
+            .filter(visit_count__gt=0)
+            .annotate(date=TruncDate('create_date'))
+            .values('date', 'user_id')
+            .annotate(
+                files=Count('pk', filter=is_file),
+                links=Count('pk', filter=~is_file),
+            )
+            .order_by('date', 'user_id')
+        )
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def fold_user_stats(sender, instance, **kwargs):
+    ItemDailyStats.fold_user(instance.pk)
+
+
+class UploadPartFile(File):
+    # lets storage move finished upload in place instead of copying it
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class Upload(models.Model):
+    CHUNK_SIZE = 64 * 1024
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+    )
+    uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
+    name = models.CharField(max_length=100)
+    size = models.BigIntegerField(null=True, blank=True)
+    offset = models.BigIntegerField(default=0)
+    create_date = models.DateTimeField(auto_now_add=True)
+    update_date = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def part_path(self):
+        return private_storage.path(f'uploads/{self.uuid}.part')
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            os.makedirs(os.path.dirname(self.part_path), exist_ok=True)
+            open(self.part_path, 'wb').close()
+        super().save(*args, **kwargs)
+
+    def write(self, stream, offset):
+        # chunk is received into its own file, so part is changed only by
+        # request still holding the offset, under lock of upload row
+        chunk_path = f'{self.part_path}.{uuid.uuid4().hex}'
+        try:
+            with open(chunk_path, 'wb') as chunk_file:
+                while stream is not None:
+                    chunk = stream.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    chunk_file.write(chunk)
+
+            with transaction.atomic():
+                current_offset = (
+                    Upload.objects.select_for_update()
+                    .values_list('offset', flat=True).get(pk=self.pk)
+                )
+                if current_offset != offset:
+                    return False
+                with open(self.part_path, 'r+b') as part, \
+                        open(chunk_path, 'rb') as chunk_file:
+                    part.seek(offset)
+                    shutil.copyfileobj(chunk_file, part, self.CHUNK_SIZE)
+                    part.truncate()
+                    self.offset = part.tell()
+                Upload.objects.filter(pk=self.pk).update(
+                    offset=self.offset, update_date=datetime.now(),
+                )
+            return True
+        finally:
+            os.remove(chunk_path)
+
+    def open_part(self):
+        return UploadPartFile(
+            open(self.part_path, 'rb'), name=os.path.basename(self.name),
+        )
+
+    def delete(self, *args, **kwargs):
+        super().delete(*args, **kwargs)
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+
+    @classmethod
+    def delete_stale(cls, batch_size):
+        stale_date = datetime.now() - settings.ITEMS_UPLOAD_LIFETIME
+        batch = list(
+            cls.objects
+            .filter(update_date__lte=stale_date)
+            .order_by('update_date')[:batch_size]
+        )
+        for upload in batch:
+            upload.delete()
+        return len(batch)
+
+
+class VisitCountBuffer(WriteBehindBuffer):
+    def merge(self, old, new):
+        return old + new
+
+    def write(self, pending):
+        Item.add_visit_counts(pending)
+
+
+visit_count_buffer = VisitCountBuffer(
+    interval=settings.ITEMS_VISIT_COUNT_FLUSH_INTERVAL,
+    max_size=settings.ITEMS_VISIT_COUNT_FLUSH_SIZE,
+)
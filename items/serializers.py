@@ -1,10 +1,18 @@
-from django.contrib.auth.hashers import make_password
+import os
+
+from django.conf import settings
+from django.db import transaction
 from django.urls import reverse
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from rest_framework.utils import html
 
 from core.helpers import generate_random_password
-from items.models import Item
-from items.validators import OneOf
+from items.hashers import make_item_password
+from items.models import (
+    Item, ItemDailyStats, Upload, get_expires_at, lock_private_files,
+)
+from items.validators import OneOf, validate_lifetime
 
 
 class ItemSerializer(serializers.ModelSerializer):
@@ -23,22 +31,79 @@ class ItemResponseSerializer(serializers.Serializer):
         )
 
 
+class ItemListCreateSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        # multipart fields like [0]url become list only when parsed
+        if html.is_html_input(data):
+            data = html.parse_html_list(data, default=[])
+        # checked before entries are validated one by one, so oversized
+        # requests are rejected without work for each of them
+        if (
+                isinstance(data, list) and
+                len(data) > settings.ITEMS_BULK_CREATE_MAX
+        ):
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Cannot create more than '
+                    f'{settings.ITEMS_BULK_CREATE_MAX} items at once.',
+                ],
+            })
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        items, passwords = [], []
+        for attrs in validated_data:
+            password = generate_random_password()
+            lifetime = attrs.pop('lifetime', None)
+            items.append(Item(
+                user=user,
+                password=make_item_password(password),
+                expires_at=get_expires_at(lifetime),
+                **attrs,
+            ))
+            passwords.append(password)
+
+        try:
+            # rows are committed before purge can check references of files
+            with lock_private_files(), transaction.atomic():
+                Item.objects.bulk_create(items)
+        except Exception:
+            # files are saved while rows are inserted, so rolled back rows
+            # would leave them orphaned
+            for item in items:
+                if item.file and item.file._committed:
+                    item.file.delete(save=False)
+            raise
+
+        # hack to show plain text passwords in API response
+        for item, password in zip(items, passwords):
+            item.password = password
+        return items
+
+
 class ItemCreateSerializer(serializers.ModelSerializer):
     password = serializers.CharField(required=False)
     url = serializers.URLField(required=False)
+    lifetime = serializers.DurationField(
+        required=False, write_only=True, validators=[validate_lifetime],
+    )
 
     class Meta:
         model = Item
-        fields = ('url', 'file', 'password')
+        fields = ('url', 'file', 'password', 'lifetime')
+        list_serializer_class = ItemListCreateSerializer
         validators = [
             OneOf(('url', 'file')),
         ]
 
     def create(self, validated_data):
         password = generate_random_password()
+        lifetime = validated_data.pop('lifetime', None)
         item = Item.objects.create(
             user=self.context['request'].user,
-            password=make_password(password),
+            password=make_item_password(password),
+            expires_at=get_expires_at(lifetime),
             **validated_data,
         )
         # hack to show plain text password in API response
@@ -49,3 +114,73 @@ class ItemCreateSerializer(serializers.ModelSerializer):
         return ItemResponseSerializer(
             instance, context=self.context['request'],
         ).data
+
+
+class ItemStatusRequestSerializer(serializers.Serializer):
+    uuids = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False,
+    )
+
+    def validate_uuids(self, value):
+        if len(value) > settings.ITEMS_STATUS_MAX:
+            raise serializers.ValidationError(
+                'Cannot check more than '
+                f'{settings.ITEMS_STATUS_MAX} items at once.',
+            )
+        return value
+
+
+class StatsRequestSerializer(serializers.Serializer):
+    since = serializers.DateField(required=False)
+    until = serializers.DateField(required=False)
+    granularity = serializers.ChoiceField(
+        choices=ItemDailyStats.GRANULARITIES, default='day',
+    )
+    user = serializers.IntegerField(required=False)
+    type = serializers.ChoiceField(choices=('files', 'links'), required=False)
+    # first day of next page of buckets
+    cursor = serializers.DateField(required=False)
+    limit = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_limit(self, value):
+        if value > settings.ITEMS_STATS_PAGE_MAX:
+            raise serializers.ValidationError(
+                'Cannot return more than '
+                f'{settings.ITEMS_STATS_PAGE_MAX} buckets at once.',
+            )
+        return value
+
+    def validate(self, data):
+        if data.get('since') and data.get('until') and (
+                data['since'] > data['until']
+        ):
+            raise serializers.ValidationError(
+                'Date since cannot be later than date until.',
+            )
+        return data
+
+
+class ItemStatusSerializer(serializers.ModelSerializer):
+    exists = serializers.BooleanField(default=True, read_only=True)
+
+    class Meta:
+        model = Item
+        fields = ('exists', 'expires_at', 'visit_count')
+
+
+class UploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Upload
+        fields = ('uuid', 'name', 'size', 'offset')
+        read_only_fields = ('uuid', 'offset')
+        extra_kwargs = {
+            'size': {'min_value': 0},
+        }
+
+    def validate_name(self, value):
+        # directories of stored files have meaning for storage (compressed
+        # and blob files), so client supplied name never contains any
+        name = os.path.basename(value.replace('\\', '/'))
+        if name in ('', '.', '..'):
+            raise serializers.ValidationError('Enter a file name.')
+        return name
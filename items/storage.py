@@ -0,0 +1,172 @@
+import fcntl
+import gzip
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOBS_DIR = 'blobs'
+LOCK_NAME = '.lock'
+# names of uploaded files are reduced to their base name (by Django for
+# multipart files, by UploadSerializer for chunked uploads), so raw file is
+# never mistaken for compressed one
+COMPRESSED_DIR = 'compressed'
+INCOMPRESSIBLE_TYPES = {
+    'application/gzip',
+    'application/pdf',
+    'application/x-7z-compressed',
+    'application/x-bzip2',
+    'application/x-rar-compressed',
+    'application/x-xz',
+    'application/zip',
+}
+
+
+def is_compressed_name(name):
+    return name.startswith(f'{COMPRESSED_DIR}/')
+
+
+def get_original_name(name):
+    if is_compressed_name(name):
+        return name[len(COMPRESSED_DIR) + 1:]
+    return name
+
+
+def is_blob_name(name):
+    return get_original_name(name).startswith(f'{BLOBS_DIR}/')
+
+
+def is_compressible(name):
+    content_type, encoding = mimetypes.guess_type(name)
+    if encoding or content_type in INCOMPRESSIBLE_TYPES:
+        return False
+    if content_type in ('image/bmp', 'image/svg+xml'):
+        return True
+    return not content_type or content_type.split('/')[0] not in (
+        'audio', 'image', 'video',
+    )
+
+
+def get_blob_name(digest, name):
+    # extension is kept so content type can still be guessed from name
+    extension = os.path.splitext(name)[1][:10]
+    prefix = f'{COMPRESSED_DIR}/' if is_compressed_name(name) else ''
+    return (
+        f'{prefix}{BLOBS_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+    )
+
+
+@contextmanager
+def lock_files(location, exclusive=False):
+    # files are stored and rows referring to them committed under shared
+    # lock, purge checks references and deletes files under exclusive one,
+    # so it never deletes blob which is just getting new item
+    os.makedirs(location, exist_ok=True)
+    with open(os.path.join(location, LOCK_NAME), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def hash_file(file, chunk_size=64 * 1024):
+    sha256 = hashlib.sha256()
+    for chunk in iter(lambda: file.read(chunk_size), b''):
+        sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+# Stores every unique content once under name derived from its SHA256. Blob
+# shared by many items is deleted only when no item refers to it anymore.
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if hasattr(content, 'temporary_file_path'):
+            with open(content.temporary_file_path(), 'rb') as file:
+                digest = hash_file(file)
+            return self._store(
+                content.temporary_file_path(), get_blob_name(digest, name),
+            )
+
+        os.makedirs(self.location, exist_ok=True)
+        sha256 = hashlib.sha256()
+        fd, temporary_path = tempfile.mkstemp(
+            prefix='.blob', dir=self.location,
+        )
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                for chunk in content.chunks():
+                    sha256.update(chunk)
+                    file.write(chunk)
+            return self._store(
+                temporary_path, get_blob_name(sha256.hexdigest(), name),
+            )
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def _store(self, path, name):
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            return name
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        file_move_safe(path, full_path, allow_overwrite=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+
+class TemporaryFile(File):
+    def temporary_file_path(self):
+        return self.name
+
+
+# Gzips compressible files while saving them under COMPRESSED_DIR,
+# compressed bytes are then moved into place by the storage.
+class CompressedStorageMixin:
+    def get_available_name(self, name, max_length=None):
+        if not is_compressed_name(name) and is_compressible(name):
+            name = f'{COMPRESSED_DIR}/{name}'
+        return super().get_available_name(name, max_length)
+
+    def _save(self, name, content):
+        if not is_compressed_name(name):
+            return super()._save(name, content)
+
+        os.makedirs(self.location, exist_ok=True)
+        fd, temporary_path = tempfile.mkstemp(
+            prefix='.compressed', dir=self.location,
+        )
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                # fixed mtime keeps output of identical files identical
+                with gzip.GzipFile(
+                    filename='', mode='wb', fileobj=file, mtime=0,
+                    compresslevel=settings.ITEMS_FILE_COMPRESSION_LEVEL,
+                ) as compressed_file:
+                    content.seek(0)
+                    shutil.copyfileobj(content, compressed_file)
+            return super()._save(name, TemporaryFile(None, temporary_path))
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+
+@deconstructible
+class CompressedFileSystemStorage(CompressedStorageMixin, FileSystemStorage):
+    pass
+
+
+@deconstructible
+class CompressedContentAddressedStorage(
+        CompressedStorageMixin, ContentAddressedStorage):
+    pass
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from core.factories import UserFactory
+from items.admin import ItemAdmin, UserListFilter
+from items.factories import ItemFactory
+from items.models import Item
+
+
+class ItemAdminTestCase(TestCase):
+    url = reverse('admin:items_item_changelist')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = UserFactory(is_staff=True, is_superuser=True)
+        cls.user = UserFactory()
+        cls.items = [ItemFactory(user=cls.user) for _ in range(3)]
+        cls.expired_item = ItemFactory(
+            user=cls.admin, expires_at=datetime.now() - timedelta(days=1),
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def _get_changelist(self, query_string=''):
+        response = self.client.get(f'{self.url}{query_string}')
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl']
+
+    def test_lists_items_by_descending_id(self):
+        cl = self._get_changelist()
+
+        self.assertEqual(
+            list(cl.result_list), [self.expired_item, *self.items[::-1]],
+        )
+        self.assertEqual(cl.result_count, 4)
+        self.assertIsNone(cl.next_page_url)
+        self.assertIsNone(cl.first_page_url)
+
+    @mock.patch.object(ItemAdmin, 'list_per_page', 2)
+    def test_pages_by_cursor(self):
+        first_page = self._get_changelist()
+        second_page = self._get_changelist(first_page.next_page_url)
+
+        self.assertEqual(
+            list(first_page.result_list), [self.expired_item, self.items[2]],
+        )
+        self.assertEqual(
+            first_page.next_page_url, f'?cursor={self.items[2].pk}',
+        )
+        self.assertEqual(
+            list(second_page.result_list), [self.items[1], self.items[0]],
+        )
+        self.assertIsNone(second_page.next_page_url)
+        self.assertEqual(second_page.first_page_url, '?')
+
+    @mock.patch.object(ItemAdmin, 'list_per_page', 2)
+    def test_cursor_is_not_preserved_by_filters(self):
+        cl = self._get_changelist(f'?cursor={self.items[2].pk}')
+
+        self.assertEqual(cl.get_query_string({'expired': '1'}), '?expired=1')
+
+    def test_invalid_cursor_shows_error(self):
+        response = self.client.get(self.url, {'cursor': 'invalid'})
+
+        self.assertRedirects(response, f'{self.url}?e=1')
+
+    def test_filters_expired_items(self):
+        expired = self._get_changelist('?expired=1')
+        live = self._get_changelist('?expired=0')
+
+        self.assertEqual(list(expired.result_list), [self.expired_item])
+        self.assertEqual(list(live.result_list), self.items[::-1])
+
+    def test_filters_items_of_user(self):
+        cl = self._get_changelist(f'?user__id__exact={self.user.pk}')
+
+        self.assertEqual(list(cl.result_list), self.items[::-1])
+
+    def test_user_filter_lists_only_owners_of_items(self):
+        UserFactory()
+        cl = self._get_changelist()
+        user_filter = cl.filter_specs[1]
+
+        self.assertEqual(
+            [pk for pk, _ in user_filter.lookup_choices],
+            [str(self.admin.pk), str(self.user.pk)],
+        )
+
+    def test_user_filter_lists_owners_in_single_query(self):
+        with self.assertNumQueries(1):
+            UserListFilter({}, {}, Item, ItemAdmin).lookup_choices
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite query plan.')
+    def test_sqlite_probes_items_of_each_user_by_index(self):
+        plan = UserListFilter.get_owners().explain()
+
+        self.assertRegex(plan, r'SEARCH U0 USING (COVERING )?INDEX \w+')
+        self.assertNotIn('SCAN U0', plan)
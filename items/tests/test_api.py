@@ -1,10 +1,17 @@
+import hashlib
 import json
+import os
 from datetime import datetime
+from io import BytesIO, StringIO
+from unittest import mock
+from uuid import uuid4
 
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.contrib.auth.hashers import check_password, make_password
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
 from django.urls import reverse_lazy
 from freezegun import freeze_time
 from parameterized import parameterized
@@ -12,17 +19,22 @@ from rest_framework.authtoken.models import Token
 from rest_framework.status import (
     HTTP_200_OK,
     HTTP_201_CREATED,
+    HTTP_206_PARTIAL_CONTENT,
+    HTTP_304_NOT_MODIFIED,
     HTTP_302_FOUND,
     HTTP_400_BAD_REQUEST,
     HTTP_401_UNAUTHORIZED,
+    HTTP_403_FORBIDDEN,
     HTTP_404_NOT_FOUND,
     HTTP_405_METHOD_NOT_ALLOWED,
+    HTTP_409_CONFLICT,
 )
 from rest_framework.test import APITestCase
 
 from core.factories import UserFactory
 from items.factories import ItemFactory
-from items.models import Item
+from items.models import Item, ItemDailyStats, Upload, stats_cache
+from items.serializers import ItemCreateSerializer
 
 
 class BaseAPITestCase(APITestCase):
@@ -151,6 +163,48 @@ class ItemApiViewSet(BaseAPITestCase):
         self.assertEqual(str(item.uuid), json_response['url'][-37:-1])
         self.assertIsNotNone(item.file)
 
+    @freeze_time('2017-10-25 12:00')
+    def test_post_authorized_with_lifetime(self):
+        data = {
+            'url': 'http://kodziek.pl',
+            'lifetime': '3600',
+        }
+        response = self._request('post', data)
+        item = Item.objects.get(user=self.user)
+
+        self.assertEqual(response.status_code, HTTP_201_CREATED)
+        self.assertEqual(item.expires_at, datetime(2017, 10, 25, 13, 0))
+
+    @parameterized.expand([
+        ('0', 'Lifetime has to be positive.'),
+        ('8 00:00:00', 'Lifetime cannot be longer than 7 days, 0:00:00.'),
+    ])
+    def test_post_authorized_incorrect_lifetime(self, lifetime, error):
+        data = {
+            'url': 'http://kodziek.pl',
+            'lifetime': lifetime,
+        }
+        response = self._request('post', data)
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertEqual(json_response, {'lifetime': [error]})
+
+    def test_post_authorized_only_lifetime(self):
+        response = self._request('post', {'lifetime': '3600'})
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            json_response,
+            {
+                'non_field_errors': [
+                    'One of following fields is required: '
+                    '(\'url\', \'file\').',
+                ],
+            },
+        )
+
     def test_retrieve_incorrect_uuid_raises_not_found(self):
         response = self._request(url=f'{self.url}uuid/')
         json_response = json.loads(response.content)
@@ -222,6 +276,69 @@ class ItemApiViewSet(BaseAPITestCase):
 
         self.assertEqual(response_content, content)
 
+    def test_retrieve_range_is_not_counted_as_visit(self):
+        password = 'password'
+        item = ItemFactory(
+            user=self.user, file=SimpleUploadedFile('file', b'content'),
+            password=make_password(password),
+        )
+        response = self.client.get(
+            f'{self.url}{item.uuid}/?password={password}',
+            HTTP_RANGE='bytes=3-',
+        )
+        item.refresh_from_db()
+
+        self.assertEqual(response.status_code, HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), b'tent')
+        self.assertEqual(item.visit_count, 0)
+
+    def test_retrieve_invalid_range_is_counted_as_visit(self):
+        password = 'password'
+        item = ItemFactory(
+            user=self.user, file=SimpleUploadedFile('file', b'content'),
+            password=make_password(password),
+        )
+        response = self.client.get(
+            f'{self.url}{item.uuid}/?password={password}',
+            HTTP_RANGE='bytes=3-1',
+        )
+        item.refresh_from_db()
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(item.visit_count, 1)
+
+    def test_retrieve_mismatched_if_range_is_counted_as_visit(self):
+        password = 'password'
+        item = ItemFactory(
+            user=self.user, file=SimpleUploadedFile('file', b'content'),
+            password=make_password(password),
+        )
+        response = self.client.get(
+            f'{self.url}{item.uuid}/?password={password}',
+            HTTP_RANGE='bytes=3-', HTTP_IF_RANGE='"other"',
+        )
+        item.refresh_from_db()
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(item.visit_count, 1)
+
+    @override_settings(ITEMS_FILE_DELIVERY='x-accel-redirect')
+    def test_retrieve_correct_password_redirects_to_file_internally(self):
+        password = 'password'
+        item = ItemFactory(
+            user=self.user, file='file', password=make_password(password),
+        )
+        response = self._request(
+            url=f'{self.url}{item.uuid}/?password={password}',
+        )
+        item.refresh_from_db()
+
+        self.assertEqual(item.visit_count, 1)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(
+            response['X-Accel-Redirect'], f'{settings.PRIVATE_MEDIA}file',
+        )
+
     def test_retrieve_item_older_than_one_day_returns_not_found(self):
         password = 'password'
         past_date = (
@@ -242,10 +359,259 @@ class ItemApiViewSet(BaseAPITestCase):
         self.assertEqual(response.status_code, HTTP_404_NOT_FOUND)
         self.assertEqual(json_response, {'detail': 'Not found.'})
 
+    def test_retrieve_correct_password_returns_grant(self):
+        password = 'password'
+        item = ItemFactory(
+            user=self.user, file=SimpleUploadedFile('file', b'content'),
+            password=make_password(password),
+        )
+        response = self._request(
+            url=f'{self.url}{item.uuid}/?password={password}',
+        )
+
+        self.assertIn('X-Item-Grant', response)
+        self.assertEqual(
+            response.cookies[settings.ITEMS_GRANT_COOKIE_NAME].value,
+            response['X-Item-Grant'],
+        )
+
+    def test_retrieve_with_grant_skips_password_and_visit_count(self):
+        password = 'password'
+        content = b'content'
+        item = ItemFactory(
+            user=self.user, file=SimpleUploadedFile('file', content),
+            password=make_password(password),
+        )
+        grant = self._request(
+            url=f'{self.url}{item.uuid}/?password={password}',
+        )['X-Item-Grant']
+        self.client.cookies.clear()
+
+        response = self._request(url=f'{self.url}{item.uuid}/?grant={grant}')
+        item.refresh_from_db()
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), content)
+        self.assertEqual(item.visit_count, 1)
+        self.assertNotIn('X-Item-Grant', response)
+
+    def test_retrieve_with_grant_cookie(self):
+        password = 'password'
+        item = ItemFactory(
+            user=self.user, url='http://kodziek.pl',
+            password=make_password(password),
+        )
+        self._request(url=f'{self.url}{item.uuid}/?password={password}')
+
+        response = self._request(url=f'{self.url}{item.uuid}/')
+
+        self.assertEqual(response.status_code, HTTP_302_FOUND)
+        self.assertEqual(response.url, item.url)
+
+    def test_retrieve_with_grant_of_other_item_raises_not_found(self):
+        password = 'password'
+        item, other_item = ItemFactory.create_batch(
+            2, user=self.user, url='http://kodziek.pl',
+            password=make_password(password),
+        )
+        grant = self._request(
+            url=f'{self.url}{other_item.uuid}/?password={password}',
+        )['X-Item-Grant']
+        self.client.cookies.clear()
+
+        response = self._request(url=f'{self.url}{item.uuid}/?grant={grant}')
+
+        self.assertEqual(response.status_code, HTTP_404_NOT_FOUND)
+
+
+class ItemBulkApiTestCase(BaseAPITestCase):
+    url = reverse_lazy('item-bulk')
+
+    def _bulk(self, data, format='json'):
+        return self.client.post(
+            self.url, data, format=format,
+            HTTP_AUTHORIZATION=f'Token {self.token.key}',
+        )
+
+    def test_post_unauthorized(self):
+        response = self.client.post(self.url, [], format='json')
+        self.assertEqual(response.status_code, HTTP_401_UNAUTHORIZED)
+
+    def test_post_creates_items_in_single_insert(self):
+        data = [
+            {'url': f'http://kodziek.pl/{index}'} for index in range(3)
+        ] + [{'url': 'http://kodziek.pl', 'lifetime': '3600'}]
+        # token, savepoint, insert and savepoint release
+        with self.assertNumQueries(4):
+            response = self._bulk(data)
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, HTTP_201_CREATED)
+        self.assertEqual(len(json_response), 4)
+        for entry, created in zip(data, json_response):
+            item = Item.objects.get(uuid=created['url'][-37:-1])
+            self.assertEqual(item.url, entry['url'])
+            self.assertEqual(item.user, self.user)
+            self.assertTrue(
+                check_password(created['password'], item.password),
+            )
+        self.assertLess(
+            item.expires_at, datetime.now() + relativedelta(hours=2),
+        )
+
+    def test_post_multipart_creates_urls_and_files(self):
+        response = self._bulk({
+            '[0]url': 'http://kodziek.pl',
+            '[1]file': SimpleUploadedFile('file', b'content'),
+        }, format='multipart')
+        json_response = json.loads(response.content)
+        url_item, file_item = [
+            Item.objects.get(uuid=created['url'][-37:-1])
+            for created in json_response
+        ]
+
+        self.assertEqual(response.status_code, HTTP_201_CREATED)
+        self.assertEqual(url_item.url, 'http://kodziek.pl')
+        with file_item.file.open() as file:
+            self.assertEqual(file.read(), b'content')
+        file_item.file.delete()
+
+    def test_post_invalid_entry_creates_nothing(self):
+        response = self._bulk([
+            {'url': 'http://kodziek.pl'},
+            {'url': 'http://kodziek.pl', 'file': 'file'},
+            {},
+        ])
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertEqual(json_response[0], {})
+        self.assertEqual(
+            json_response[2],
+            {
+                'non_field_errors': [
+                    'One of following fields is required: '
+                    '(\'url\', \'file\').',
+                ],
+            },
+        )
+        self.assertFalse(Item.all_objects.exists())
+
+    @override_settings(ITEMS_BULK_CREATE_MAX=2)
+    def test_post_too_many_entries(self):
+        response = self._bulk([{'url': 'http://kodziek.pl'}] * 3)
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            json_response,
+            {'non_field_errors': ['Cannot create more than 2 items at once.']},
+        )
+        self.assertFalse(Item.all_objects.exists())
+
+    @override_settings(ITEMS_BULK_CREATE_MAX=2)
+    def test_post_too_many_multipart_entries(self):
+        response = self._bulk({
+            f'[{index}]url': 'http://kodziek.pl' for index in range(5)
+        }, format='multipart')
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            json_response,
+            {'non_field_errors': ['Cannot create more than 2 items at once.']},
+        )
+        self.assertFalse(Item.all_objects.exists())
+
+    @override_settings(ITEMS_BULK_CREATE_MAX=2)
+    def test_post_too_many_entries_skips_validation_of_entries(self):
+        with mock.patch.object(
+                ItemCreateSerializer, 'run_validation',
+        ) as run_validation:
+            response = self._bulk([{}] * 3)
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            json_response,
+            {'non_field_errors': ['Cannot create more than 2 items at once.']},
+        )
+        run_validation.assert_not_called()
+
+
+class ItemStatusApiTestCase(BaseAPITestCase):
+    url = reverse_lazy('item-status')
+
+    def _status(self, uuids):
+        return self.client.post(
+            self.url, {'uuids': uuids}, format='json',
+            HTTP_AUTHORIZATION=f'Token {self.token.key}',
+        )
+
+    def test_post_unauthorized(self):
+        response = self.client.post(self.url, {'uuids': []}, format='json')
+        self.assertEqual(response.status_code, HTTP_401_UNAUTHORIZED)
+
+    @freeze_time('2017-10-25 12:00')
+    def test_post_returns_status_of_own_live_items(self):
+        item = ItemFactory(
+            user=self.user, url='http://kodziek.pl', visit_count=3,
+        )
+        with freeze_time('2017-10-23 12:00'):
+            expired_item = ItemFactory(user=self.user, file='file')
+        other_item = ItemFactory(user=UserFactory(), url='http://kodziek.pl')
+        missing = {'exists': False, 'expires_at': None, 'visit_count': None}
+
+        # token and items
+        with self.assertNumQueries(2):
+            response = self._status([
+                str(item.uuid), str(expired_item.uuid), str(other_item.uuid),
+            ])
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(json_response, {
+            str(item.uuid): {
+                'exists': True,
+                'expires_at': '2017-10-26T12:00:00',
+                'visit_count': 3,
+            },
+            str(expired_item.uuid): missing,
+            str(other_item.uuid): missing,
+        })
+
+    @parameterized.expand([
+        ([], 'This list may not be empty.'),
+        (['uuid'], 'Must be a valid UUID.'),
+    ])
+    def test_post_invalid_uuids(self, uuids, error):
+        response = self._status(uuids)
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertIn(error, str(json_response['uuids']))
+
+    @override_settings(ITEMS_STATUS_MAX=1)
+    def test_post_too_many_uuids(self):
+        response = self._status([str(uuid4()), str(uuid4())])
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            json_response,
+            {'uuids': ['Cannot check more than 1 items at once.']},
+        )
+
 
 class StatsApiViewSetTestCase(BaseAPITestCase):
     url = reverse_lazy('stats-list')
 
+    def setUp(self):
+        stats_cache.clear()
+
+    def _get_json(self, response):
+        return json.loads(response.getvalue())
+
     def test_get_unauthorized(self):
         response = self.client.get(self.url)
         json_response = json.loads(response.content)
@@ -266,7 +632,7 @@ class StatsApiViewSetTestCase(BaseAPITestCase):
 
     def test_get_no_items(self):
         response = self._request()
-        json_response = json.loads(response.content)
+        json_response = self._get_json(response)
 
         self.assertEqual(response.status_code, HTTP_200_OK)
         self.assertEqual(json_response, {})
@@ -295,9 +661,423 @@ class StatsApiViewSetTestCase(BaseAPITestCase):
             ItemFactory(user=self.user, file=file, visit_count=2)
             ItemFactory(user=self.user, file=file)
             ItemFactory(user=self.user, url=url)
+        call_command('rebuild_item_stats', '--all', stdout=StringIO())
 
         response = self._request()
-        json_response = json.loads(response.content)
+        json_response = self._get_json(response)
 
         self.assertEqual(response.status_code, HTTP_200_OK)
         self.assertEqual(json_response, expected_response)
+
+    def test_get_counts_item_with_empty_url_as_file(self):
+        with freeze_time('2017-10-25'):
+            ItemFactory(
+                user=self.user, url='',
+                file=SimpleUploadedFile('file', b'content'), visit_count=1,
+            )
+        call_command('rebuild_item_stats', '--all', stdout=StringIO())
+
+        response = self._request()
+        json_response = self._get_json(response)
+
+        self.assertEqual(
+            json_response, {'2017-10-25': {'files': 1, 'links': 0}},
+        )
+
+    def test_get_reads_stats_updated_by_visits(self):
+        with freeze_time('2017-10-25'):
+            item = ItemFactory(user=self.user, url='http://kodziek.pl')
+        with freeze_time('2017-10-25 12:00'):
+            Item.increment_visit_count(item.pk)
+            Item.increment_visit_count(item.pk)
+
+        response = self._request()
+        json_response = self._get_json(response)
+
+        self.assertEqual(
+            json_response, {'2017-10-25': {'files': 0, 'links': 1}},
+        )
+
+
+class StatsApiViewSetFiltersTestCase(BaseAPITestCase):
+    url = reverse_lazy('stats-list')
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_user = UserFactory()
+        for day, files, links in (
+                ('2017-10-29', 1, 0),
+                ('2017-10-30', 2, 1),
+                ('2017-11-01', 0, 3),
+        ):
+            ItemDailyStats.objects.create(
+                date=day, user=cls.user, files=files, links=links,
+            )
+        ItemDailyStats.objects.create(
+            date='2017-10-30', user=cls.other_user, files=4,
+        )
+        # rolled up before stats were kept per user
+        ItemDailyStats.objects.create(date='2017-10-30', links=5)
+
+    def setUp(self):
+        stats_cache.clear()
+
+    def _get_json(self, data=None):
+        response = self._request(data=data)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        return json.loads(response.getvalue())
+
+    def test_filters_date_range(self):
+        self.assertEqual(
+            self._get_json({'since': '2017-10-30', 'until': '2017-10-31'}),
+            {'2017-10-30': {'files': 6, 'links': 6}},
+        )
+
+    def test_date_since_cannot_be_later_than_date_until(self):
+        response = self._request(
+            data={'since': '2017-10-31', 'until': '2017-10-30'},
+        )
+
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            json.loads(response.content),
+            {'non_field_errors': [
+                'Date since cannot be later than date until.',
+            ]},
+        )
+
+    @parameterized.expand([
+        ('week', {
+            '2017-10-23': {'files': 1, 'links': 0},
+            '2017-10-30': {'files': 6, 'links': 9},
+        }),
+        ('month', {
+            '2017-10-01': {'files': 7, 'links': 6},
+            '2017-11-01': {'files': 0, 'links': 3},
+        }),
+    ])
+    def test_groups_by_granularity(self, granularity, expected_response):
+        self.assertEqual(
+            self._get_json({'granularity': granularity}), expected_response,
+        )
+
+    def test_invalid_granularity(self):
+        response = self._request(data={'granularity': 'year'})
+
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+    def test_filters_stats_of_user(self):
+        self.assertEqual(self._get_json({'user': self.user.pk}), {
+            '2017-10-29': {'files': 1, 'links': 0},
+            '2017-10-30': {'files': 2, 'links': 1},
+            '2017-11-01': {'files': 0, 'links': 3},
+        })
+
+    def test_stats_of_other_user_are_forbidden(self):
+        response = self._request(data={'user': self.other_user.pk})
+
+        self.assertEqual(response.status_code, HTTP_403_FORBIDDEN)
+
+    def test_staff_reads_stats_of_other_user(self):
+        staff_token = Token.objects.create(user=UserFactory(is_staff=True))
+        response = self.client.get(
+            self.url, {'user': self.other_user.pk},
+            HTTP_AUTHORIZATION=f'Token {staff_token.key}',
+        )
+
+        self.assertEqual(
+            json.loads(response.getvalue()),
+            {'2017-10-30': {'files': 4, 'links': 0}},
+        )
+
+    def test_filters_type(self):
+        self.assertEqual(self._get_json({'type': 'links'}), {
+            '2017-10-29': {'links': 0},
+            '2017-10-30': {'links': 6},
+            '2017-11-01': {'links': 3},
+        })
+
+    def test_pages_buckets_by_cursor(self):
+        response = self._request(data={'granularity': 'week', 'limit': 1})
+        next_url = 'http://testserver/api/stats/?cursor=2017-10-30&' \
+            'granularity=week&limit=1'
+
+        self.assertEqual(
+            json.loads(response.getvalue()),
+            {'2017-10-23': {'files': 1, 'links': 0}},
+        )
+        self.assertEqual(response['Link'], f'<{next_url}>; rel="next"')
+
+        response = self._request(url=next_url)
+
+        self.assertEqual(
+            json.loads(response.getvalue()),
+            {'2017-10-30': {'files': 6, 'links': 9}},
+        )
+        self.assertFalse(response.has_header('Link'))
+
+    @override_settings(ITEMS_STATS_PAGE_MAX=2)
+    def test_limit_cannot_exceed_page_max(self):
+        response = self._request(data={'limit': 3})
+
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+
+class StatsApiViewSetCacheTestCase(BaseAPITestCase):
+    url = reverse_lazy('stats-list')
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        ItemDailyStats.objects.create(
+            date='2017-10-25', user=cls.user, files=1,
+        )
+
+    def setUp(self):
+        stats_cache.clear()
+        self.response = self._request()
+
+    def test_response_has_etag_of_body(self):
+        self.assertEqual(
+            self.response['ETag'],
+            f'"{hashlib.sha256(self.response.content).hexdigest()}"',
+        )
+        self.assertFalse(self.response.has_header('Last-Modified'))
+
+    def test_if_none_match_poll_is_not_modified_without_queries(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.url, HTTP_AUTHORIZATION=f'Token {self.token.key}',
+                HTTP_IF_NONE_MATCH=self.response['ETag'],
+            )
+
+        self.assertEqual(response.status_code, HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], self.response['ETag'])
+
+    def test_poll_answered_by_other_process_is_not_modified(self):
+        stats_cache.clear()
+        response = self.client.get(
+            self.url, HTTP_AUTHORIZATION=f'Token {self.token.key}',
+            HTTP_IF_NONE_MATCH=self.response['ETag'],
+        )
+
+        self.assertEqual(response.status_code, HTTP_304_NOT_MODIFIED)
+
+    def test_repeated_request_is_served_from_cache(self):
+        with self.assertNumQueries(0):
+            response = self._request()
+
+        self.assertEqual(response['ETag'], self.response['ETag'])
+        self.assertEqual(
+            json.loads(response.content),
+            {'2017-10-25': {'files': 1, 'links': 0}},
+        )
+
+    @override_settings(ITEMS_STATS_CACHE_MAX_BODY=10)
+    def test_large_response_is_streamed_without_validators(self):
+        stats_cache.clear()
+        self._request()
+        with self.assertNumQueries(1):
+            response = self._request()
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            json.loads(response.getvalue()),
+            {'2017-10-25': {'files': 1, 'links': 0}},
+        )
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_other_query_has_other_validators(self):
+        response = self._request(data={'granularity': 'month'})
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], self.response['ETag'])
+
+    def test_first_visit_changes_stats(self):
+        with freeze_time('2017-10-25'):
+            item = ItemFactory(user=self.user, url='http://kodziek.pl')
+        Item.increment_visit_count(item.pk)
+        Item.increment_visit_count(item.pk)
+
+        response = self.client.get(
+            self.url, HTTP_AUTHORIZATION=f'Token {self.token.key}',
+            HTTP_IF_NONE_MATCH=self.response['ETag'],
+        )
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], self.response['ETag'])
+        self.assertEqual(
+            json.loads(response.getvalue()),
+            {'2017-10-25': {'files': 1, 'links': 1}},
+        )
+
+    def test_rebuild_changes_stats(self):
+        call_command('rebuild_item_stats', '--all', stdout=StringIO())
+
+        response = self.client.get(
+            self.url, HTTP_AUTHORIZATION=f'Token {self.token.key}',
+            HTTP_IF_NONE_MATCH=self.response['ETag'],
+        )
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(json.loads(response.getvalue()), {})
+
+
+class UploadApiViewSetTestCase(BaseAPITestCase):
+    url = reverse_lazy('upload-list')
+
+    def tearDown(self):
+        for upload in Upload.objects.all():
+            upload.delete()
+
+    def _create_upload(self, **data):
+        response = self._request('post', {'name': 'file.txt', **data})
+        return json.loads(response.content)['uuid']
+
+    def _put(self, upload_uuid, offset, content):
+        return self.client.put(
+            f'{self.url}{upload_uuid}/?offset={offset}', content,
+            content_type='application/octet-stream',
+            HTTP_AUTHORIZATION=f'Token {self.token.key}',
+        )
+
+    def _finalize(self, upload_uuid, data=None):
+        return self._request(
+            'post', data, url=f'{self.url}{upload_uuid}/finalize/',
+        )
+
+    def test_post_unauthorized(self):
+        response = self.client.post(self.url, data={'name': 'file.txt'})
+
+        self.assertEqual(response.status_code, HTTP_401_UNAUTHORIZED)
+
+    def test_post_creates_upload(self):
+        response = self._request('post', {'name': 'file.txt', 'size': 10})
+        json_response = json.loads(response.content)
+        upload = Upload.objects.get(user=self.user)
+
+        self.assertEqual(response.status_code, HTTP_201_CREATED)
+        self.assertEqual(json_response, {
+            'uuid': str(upload.uuid), 'name': 'file.txt', 'size': 10,
+            'offset': 0,
+        })
+
+    def test_put_chunks_and_finalize_creates_item(self):
+        upload_uuid = self._create_upload(size=11)
+
+        response = self._put(upload_uuid, 0, b'chunked ')
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['offset'], 8)
+        response = self._put(upload_uuid, 8, b'big')
+        self.assertEqual(json.loads(response.content)['offset'], 11)
+
+        response = self._finalize(upload_uuid, {'lifetime': '3600'})
+        json_response = json.loads(response.content)
+        item = Item.objects.get(user=self.user)
+
+        self.assertEqual(response.status_code, HTTP_201_CREATED)
+        self.assertEqual(tuple(json_response.keys()), ('url', 'password'))
+        self.assertTrue(
+            check_password(json_response['password'], item.password),
+        )
+        self.assertEqual(item.file.read(), b'chunked big')
+        self.assertRegex(item.file.name, r'^file(_\w+)?\.txt$')
+        self.assertFalse(Upload.objects.exists())
+        item.file.close()
+        item.file.delete()
+
+    @parameterized.expand([
+        ('compressed/file.txt', 'file.txt'),
+        ('..\\compressed\\file.txt', 'file.txt'),
+    ])
+    def test_post_reduces_name_to_base_name(self, name, expected_name):
+        response = self._request('post', {'name': name})
+
+        self.assertEqual(response.status_code, HTTP_201_CREATED)
+        self.assertEqual(json.loads(response.content)['name'], expected_name)
+
+    @parameterized.expand(['compressed/', 'compressed/..'])
+    def test_post_name_without_base_name(self, name):
+        response = self._request('post', {'name': name})
+
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            json.loads(response.content), {'name': ['Enter a file name.']},
+        )
+
+    def test_get_returns_received_offset(self):
+        upload_uuid = self._create_upload()
+        self._put(upload_uuid, 0, b'content')
+
+        response = self._request(url=f'{self.url}{upload_uuid}/')
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['offset'], 7)
+
+    def test_put_chunk_at_wrong_offset_returns_conflict(self):
+        upload_uuid = self._create_upload()
+        self._put(upload_uuid, 0, b'content')
+
+        response = self._put(upload_uuid, 3, b'tent')
+
+        self.assertEqual(response.status_code, HTTP_409_CONFLICT)
+        self.assertEqual(json.loads(response.content)['offset'], 7)
+
+    def test_put_chunk_retried_after_offset_query(self):
+        upload_uuid = self._create_upload()
+        self._put(upload_uuid, 0, b'con')
+        upload = Upload.objects.get()
+        with open(upload.part_path, 'ab') as part:
+            # bytes of interrupted chunk not acknowledged by offset
+            part.write(b'xx')
+
+        self._put(upload_uuid, 3, b'tent')
+
+        with open(upload.part_path, 'rb') as part:
+            self.assertEqual(part.read(), b'content')
+
+    def test_conflicting_chunk_does_not_change_part(self):
+        upload_uuid = self._create_upload()
+        upload = Upload.objects.get()
+        stale_upload = Upload.objects.get()
+
+        self.assertTrue(upload.write(BytesIO(b'content'), 0))
+        # concurrent request which read the same offset before
+        self.assertFalse(stale_upload.write(BytesIO(b'xx'), 0))
+
+        with open(upload.part_path, 'rb') as part:
+            self.assertEqual(part.read(), b'content')
+        self.assertEqual(Upload.objects.get(uuid=upload_uuid).offset, 7)
+        self.assertEqual(os.listdir(os.path.dirname(upload.part_path)), [
+            os.path.basename(upload.part_path),
+        ])
+
+    @parameterized.expand([
+        ('', ['A valid integer is required.']),
+        ('a', ['A valid integer is required.']),
+        ('0', ['Chunk exceeds declared upload size.']),
+    ])
+    def test_put_invalid_chunk(self, offset, error):
+        upload_uuid = self._create_upload(size=2)
+
+        response = self._put(upload_uuid, offset, b'content')
+
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertEqual(json.loads(response.content), {'offset': error})
+
+    def test_finalize_incomplete_upload_fails(self):
+        upload_uuid = self._create_upload(size=10)
+        self._put(upload_uuid, 0, b'content')
+
+        response = self._finalize(upload_uuid)
+
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertFalse(Item.objects.exists())
+
+    def test_upload_of_other_user_is_not_found(self):
+        upload = Upload.objects.create(user=UserFactory(), name='file.txt')
+
+        response = self._put(upload.uuid, 0, b'content')
+
+        self.assertEqual(response.status_code, HTTP_404_NOT_FOUND)
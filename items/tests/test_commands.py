@@ -0,0 +1,167 @@
+import os
+from datetime import date, datetime
+from io import StringIO
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from freezegun import freeze_time
+
+from core.factories import UserFactory
+from items.factories import ItemFactory
+from items.models import (
+    Item, ItemDailyStats, ItemPurgeMark, Upload, private_storage,
+)
+
+
+class RebuildItemStatsCommandTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        with freeze_time('2017-10-25'):
+            ItemFactory(user=cls.user, url='http://kodziek.pl', visit_count=1)
+            ItemFactory(user=cls.user, file='file', visit_count=3)
+            ItemFactory(user=cls.user, file='file')
+        with freeze_time('2017-10-26'):
+            ItemFactory(user=cls.user, file='file', visit_count=1)
+
+    def _call_command(self, *args):
+        call_command('rebuild_item_stats', *args, stdout=StringIO())
+        return list(
+            ItemDailyStats.objects.values_list('date', 'files', 'links'),
+        )
+
+    def test_backfills_missing_stats(self):
+        self.assertEqual(self._call_command('--all'), [
+            (date(2017, 10, 25), 1, 1),
+            (date(2017, 10, 26), 1, 0),
+        ])
+
+    def test_reconciles_by_default_only_days_without_purged_items(self):
+        ItemPurgeMark.objects.update(create_date=datetime(2017, 10, 25, 12))
+        ItemDailyStats.objects.create(date=date(2017, 10, 24), files=7)
+        ItemDailyStats.objects.create(date=date(2017, 10, 25), files=7)
+
+        self.assertEqual(self._call_command(), [
+            (date(2017, 10, 24), 7, 0),
+            (date(2017, 10, 25), 7, 0),
+            (date(2017, 10, 26), 1, 0),
+        ])
+
+    def test_reconciles_drifted_and_stale_stats(self):
+        ItemDailyStats.objects.create(date=date(2017, 10, 25), files=7)
+        ItemDailyStats.objects.create(date=date(2017, 10, 27), links=1)
+
+        self.assertEqual(self._call_command('--all'), [
+            (date(2017, 10, 25), 1, 1),
+            (date(2017, 10, 26), 1, 0),
+        ])
+
+    def test_rolls_up_stats_of_every_user(self):
+        with freeze_time('2017-10-25'):
+            ItemFactory(user=UserFactory(), file='file', visit_count=1)
+        self._call_command('--all')
+
+        self.assertEqual(
+            list(ItemDailyStats.objects.filter(
+                date=date(2017, 10, 25),
+            ).order_by('user').values_list('files', 'links')),
+            [(1, 1), (1, 0)],
+        )
+
+    def test_replaces_stats_without_user(self):
+        ItemDailyStats.objects.create(date=date(2017, 10, 26), files=1)
+        self._call_command('--all')
+
+        self.assertEqual(
+            ItemDailyStats.objects.get(date=date(2017, 10, 26)).user,
+            self.user,
+        )
+
+    def test_keeps_stats_of_purged_items(self):
+        ItemPurgeMark.objects.update(create_date=datetime(2017, 10, 1))
+        with freeze_time('2017-10-27'):
+            item = ItemFactory(user=self.user, url='http://kodziek.pl')
+            Item.increment_visit_count(item.pk)
+        with freeze_time('2017-10-31'):
+            Item.delete_expired(10)
+            stats = self._call_command()
+
+        self.assertEqual(stats, [(date(2017, 10, 27), 0, 1)])
+
+    def test_reconciles_only_stats_since_given_day(self):
+        ItemDailyStats.objects.create(date=date(2017, 10, 25), files=7)
+
+        self.assertEqual(self._call_command('--since', '2017-10-26'), [
+            (date(2017, 10, 25), 7, 0),
+            (date(2017, 10, 26), 1, 0),
+        ])
+
+
+class PurgeItemsCommandTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+
+    def setUp(self):
+        expired_date = (
+            datetime.now() - settings.ITEMS_LIFETIME - relativedelta(seconds=5)
+        )
+        with freeze_time(expired_date):
+            self.expired_items = [
+                ItemFactory(
+                    user=self.user,
+                    file=SimpleUploadedFile('file', b'content'),
+                )
+                for _ in range(3)
+            ] + [
+                ItemFactory(user=self.user, url='http://kodziek.pl'),
+                ItemFactory(user=self.user, file='missing'),
+            ]
+        self.live_item = ItemFactory(
+            user=self.user, file=SimpleUploadedFile('file', b'content'),
+        )
+
+    def tearDown(self):
+        private_storage.delete(self.live_item.file.name)
+
+    def test_deletes_expired_items_and_files_in_batches(self):
+        stdout = StringIO()
+        call_command(
+            'purge_items', '--batch-size', '2', '--pause', '0', stdout=stdout,
+        )
+
+        self.assertEqual(
+            list(Item.all_objects.values_list('pk', flat=True)),
+            [self.live_item.pk],
+        )
+        for item in self.expired_items[:3]:
+            self.assertFalse(private_storage.exists(item.file.name))
+        self.assertTrue(private_storage.exists(self.live_item.file.name))
+        self.assertIn(
+            'Purged 5 items, 4 files (1 missing) and 0 stale uploads',
+            stdout.getvalue(),
+        )
+
+    def test_delete_expired_returns_batch_counts(self):
+        self.assertEqual(Item.delete_expired(4), (4, 3, 0))
+        self.assertEqual(Item.delete_expired(4), (1, 1, 1))
+        self.assertEqual(Item.delete_expired(4), (0, 0, 0))
+
+    def test_deletes_stale_uploads(self):
+        stale_date = (
+            datetime.now() - settings.ITEMS_UPLOAD_LIFETIME -
+            relativedelta(seconds=5)
+        )
+        with freeze_time(stale_date):
+            stale_upload = Upload.objects.create(user=self.user, name='file')
+        upload = Upload.objects.create(user=self.user, name='file')
+        stdout = StringIO()
+        call_command('purge_items', stdout=stdout)
+
+        self.assertEqual(list(Upload.objects.all()), [upload])
+        self.assertFalse(os.path.exists(stale_upload.part_path))
+        self.assertIn('and 1 stale uploads', stdout.getvalue())
+        upload.delete()
@@ -0,0 +1,227 @@
+import gzip
+from datetime import datetime
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from parameterized import parameterized
+
+from items.delivery import (
+    accepts_gzip, get_file_response, parse_range_header,
+)
+from items.factories import ItemFactory
+from items.models import private_storage
+from items.storage import CompressedFileSystemStorage
+
+
+class ParseRangeHeaderTestCase(SimpleTestCase):
+    @parameterized.expand([
+        ('bytes=0-4', [(0, 4)]),
+        ('bytes=5-', [(5, 9)]),
+        ('bytes=-3', [(7, 9)]),
+        ('bytes=-30', [(0, 9)]),
+        ('bytes=2-100', [(2, 9)]),
+        ('bytes=0-1, 4-5,-1', [(0, 1), (4, 5), (9, 9)]),
+        ('bytes=10-', []),
+        ('bytes=10-20,-0', []),
+        ('bytes=10-20,0-0', [(0, 0)]),
+        ('bytes=5-4', None),
+        ('bytes=-', None),
+        ('bytes=a-b', None),
+        ('items=0-4', None),
+        ('bytes=' + ','.join(['0-1'] * 17), None),
+    ])
+    def test_parse(self, header, expected):
+        self.assertEqual(parse_range_header(header, 10), expected)
+
+
+class AcceptsGzipTestCase(SimpleTestCase):
+    @parameterized.expand([
+        ('gzip, deflate, br', True),
+        ('deflate, GZIP;q=0.5', True),
+        ('*', True),
+        ('gzip;q=0', False),
+        ('gzip;q=x', False),
+        ('deflate, br', False),
+        ('', False),
+    ])
+    def test_accepts_gzip(self, header, expected):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=header)
+        self.assertEqual(accepts_gzip(request), expected)
+
+
+class GetFileResponseTestCase(SimpleTestCase):
+    content = b'0123456789'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.file_name = private_storage.save(
+            'file', SimpleUploadedFile('file', cls.content),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        private_storage.delete(cls.file_name)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.item = ItemFactory.build(
+            file=self.file_name, create_date=datetime(2017, 10, 25),
+        )
+        self.etag = f'"{self.item.uuid}"'
+
+    def _get_response(self, **headers):
+        request = RequestFactory().get('/', **headers)
+        return get_file_response(request, self.item)
+
+    def test_stream_returns_whole_file_with_validators(self):
+        response = self._get_response()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertIn('Last-Modified', response)
+
+    def test_stream_returns_single_range(self):
+        response = self._get_response(HTTP_RANGE='bytes=2-5')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(response['Content-Length'], '4')
+
+    def test_stream_returns_multiple_ranges(self):
+        response = self._get_response(HTTP_RANGE='bytes=0-1,-2')
+        content = b''.join(response.streaming_content)
+        boundary = response['Content-Type'].split('boundary=')[1]
+
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(
+            response['Content-Type'].startswith('multipart/byteranges'),
+        )
+        self.assertEqual(response['Content-Length'], str(len(content)))
+        self.assertEqual(content.count(f'--{boundary}'.encode()), 3)
+        self.assertIn(
+            b'Content-Range: bytes 0-1/10\r\n\r\n01\r\n', content,
+        )
+        self.assertIn(
+            b'Content-Range: bytes 8-9/10\r\n\r\n89\r\n', content,
+        )
+        self.assertTrue(content.endswith(f'--{boundary}--\r\n'.encode()))
+
+    def test_stream_unsatisfiable_range(self):
+        response = self._get_response(HTTP_RANGE='bytes=20-')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_stream_ignores_invalid_range(self):
+        response = self._get_response(HTTP_RANGE='bytes=5-4')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_stream_returns_range_for_matching_if_range(self):
+        response = self._get_response(
+            HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE=self.etag,
+        )
+        self.assertEqual(response.status_code, 206)
+        response.close()
+
+        last_modified = response['Last-Modified']
+        response = self._get_response(
+            HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE=last_modified,
+        )
+        self.assertEqual(response.status_code, 206)
+        response.close()
+
+    @parameterized.expand([
+        '"other"', 'W/"other"', 'Wed, 21 Oct 2015 07:28:00 GMT',
+    ])
+    def test_stream_returns_whole_file_for_stale_if_range(self, if_range):
+        response = self._get_response(
+            HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE=if_range,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    @override_settings(
+        ITEMS_FILE_DELIVERY='x-accel-redirect',
+        ITEMS_FILE_ACCEL_REDIRECT_PREFIX='/internal/',
+    )
+    def test_x_accel_redirect_points_to_internal_location(self):
+        self.item.file = 'dir/secret file.txt'
+        response = self._get_response()
+
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/internal/dir/secret%20file.txt',
+        )
+        self.assertNotIn('Content-Type', response)
+        self.assertEqual(response.content, b'')
+
+    @override_settings(ITEMS_FILE_DELIVERY='x-sendfile')
+    def test_x_sendfile_points_to_file_path(self):
+        response = self._get_response()
+
+        self.assertEqual(
+            response['X-Sendfile'], private_storage.path(self.file_name),
+        )
+        self.assertNotIn('Content-Type', response)
+
+    @override_settings(ITEMS_FILE_DELIVERY='unknown')
+    def test_unknown_delivery_raises_error(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self._get_response()
+
+
+class GetCompressedFileResponseTestCase(SimpleTestCase):
+    content = b'{"key": "value"}\n' * 1000
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.file_name = CompressedFileSystemStorage(
+            location=private_storage.location,
+        ).save('file.json', ContentFile(cls.content))
+
+    @classmethod
+    def tearDownClass(cls):
+        private_storage.delete(cls.file_name)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.item = ItemFactory.build(
+            file=self.file_name, create_date=datetime(2017, 10, 25),
+        )
+
+    def _get_response(self, **headers):
+        request = RequestFactory().get('/', **headers)
+        return get_file_response(request, self.item)
+
+    def test_returns_compressed_file_when_gzip_is_accepted(self):
+        response = self._get_response(HTTP_ACCEPT_ENCODING='gzip')
+        content = b''.join(response.streaming_content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(gzip.decompress(content), self.content)
+        self.assertLess(len(content), len(self.content))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Length'], str(len(content)))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response['ETag'], f'"{self.item.uuid}-gzip"')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    @override_settings(ITEMS_FILE_DELIVERY='x-accel-redirect')
+    def test_decompresses_file_when_gzip_is_not_accepted(self):
+        response = self._get_response(HTTP_RANGE='bytes=0-1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response['Accept-Ranges'], 'none')
+        self.assertEqual(response['ETag'], f'"{self.item.uuid}"')
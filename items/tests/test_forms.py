@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from django.contrib.auth.hashers import make_password, check_password
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
@@ -43,6 +45,27 @@ class ItemFormTestCase(SimpleTestCase):
         form = ItemForm(files=files)
         self.assertFalse(form.is_valid())
 
+    def test_validation_valid_lifetime(self):
+        data = {
+            'url': 'http://kodziek.pl',
+            'lifetime': '01:00:00',
+        }
+        form = ItemForm(data)
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['lifetime'], timedelta(hours=1))
+
+    def test_validation_too_long_lifetime(self):
+        data = {
+            'url': 'http://kodziek.pl',
+            'lifetime': '30 00:00:00',
+        }
+        form = ItemForm(data)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(
+            form.errors['lifetime'],
+            ['Lifetime cannot be longer than 7 days, 0:00:00.'],
+        )
+
     def test_validation_both_fields(self):
         data = {
             'url': 'http://kodziek.pl',
@@ -98,3 +121,6 @@ class ItemPasswordFormTestCase(SimpleTestCase):
         self.assertTrue(
             check_password(password, form.cleaned_data['password']),
         )
+        self.assertTrue(
+            form.cleaned_data['password'].startswith('pbkdf2_sha256$'),
+        )
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from freezegun import freeze_time
+
+from items.factories import ItemFactory
+from items.grants import (
+    check_grant,
+    get_grant_expiry,
+    get_request_grant,
+    make_grant,
+    set_grant,
+)
+
+
+class GrantsTestCase(SimpleTestCase):
+    def setUp(self):
+        self.item = ItemFactory.build(password='hash')
+
+    def test_grant_is_valid_for_item(self):
+        self.assertTrue(check_grant(make_grant(self.item), self.item))
+
+    def test_grant_is_invalid_for_other_item(self):
+        other_item = ItemFactory.build(password='hash')
+
+        self.assertFalse(check_grant(make_grant(self.item), other_item))
+
+    def test_grant_is_revoked_by_password_change(self):
+        grant = make_grant(self.item)
+        self.item.password = 'new hash'
+
+        self.assertFalse(check_grant(grant, self.item))
+
+    def test_tampered_or_missing_grant_is_invalid(self):
+        grant = make_grant(self.item)
+
+        self.assertFalse(check_grant(f'{grant}x', self.item))
+        self.assertFalse(check_grant(None, self.item))
+
+    def test_grant_expires(self):
+        grant = make_grant(self.item)
+        expiry = datetime.now() + settings.ITEMS_GRANT_LIFETIME
+
+        with freeze_time(expiry + relativedelta(seconds=1)):
+            self.assertFalse(check_grant(grant, self.item))
+
+    def test_grant_does_not_outlive_item(self):
+        self.item.expires_at = datetime.now() + relativedelta(minutes=1)
+
+        self.assertEqual(get_grant_expiry(self.item), self.item.expires_at)
+
+    def test_request_grant_from_query_param_or_cookie(self):
+        request = RequestFactory().get('/', {'grant': 'param'})
+        request.COOKIES[settings.ITEMS_GRANT_COOKIE_NAME] = 'cookie'
+        self.assertEqual(get_request_grant(request), 'param')
+
+        request = RequestFactory().get('/')
+        request.COOKIES[settings.ITEMS_GRANT_COOKIE_NAME] = 'cookie'
+        self.assertEqual(get_request_grant(request), 'cookie')
+
+    def test_set_grant_sets_header_and_path_scoped_cookie(self):
+        request = RequestFactory().get('/item/path')
+        response = set_grant(HttpResponse(), request, self.item)
+        cookie = response.cookies[settings.ITEMS_GRANT_COOKIE_NAME]
+
+        self.assertTrue(check_grant(response['X-Item-Grant'], self.item))
+        self.assertEqual(cookie.value, response['X-Item-Grant'])
+        self.assertEqual(cookie['path'], '/item/path')
+        self.assertTrue(cookie['httponly'])
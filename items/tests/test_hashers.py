@@ -0,0 +1,78 @@
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.factories import UserFactory
+from items.factories import ItemFactory
+from items.hashers import (
+    HMACSHA256PasswordHasher,
+    check_item_password,
+    make_item_password,
+)
+from items.models import Item
+
+
+class HMACSHA256PasswordHasherTestCase(SimpleTestCase):
+    def setUp(self):
+        self.hasher = HMACSHA256PasswordHasher()
+
+    def test_encode_and_verify(self):
+        encoded = self.hasher.encode('pwd', 'salt')
+
+        self.assertTrue(encoded.startswith('hmac_sha256$salt$'))
+        self.assertTrue(self.hasher.verify('pwd', encoded))
+        self.assertFalse(self.hasher.verify('incorrect', encoded))
+
+    def test_verify_fails_with_different_secret(self):
+        encoded = self.hasher.encode('pwd', 'salt')
+
+        with override_settings(ITEMS_PASSWORD_SECRET='other secret'):
+            self.assertFalse(self.hasher.verify('pwd', encoded))
+
+    def test_safe_summary_masks_hash(self):
+        encoded = self.hasher.encode('pwd', 'salt')
+        summary = self.hasher.safe_summary(encoded)
+
+        self.assertEqual(summary['algorithm'], 'hmac_sha256')
+        self.assertNotIn(encoded.rsplit('$', 1)[1], summary['hash'])
+
+    def test_make_item_password_uses_item_hasher(self):
+        encoded = make_item_password('pwd')
+
+        self.assertTrue(encoded.startswith('hmac_sha256$'))
+        self.assertTrue(check_password('pwd', encoded))
+
+
+class CheckItemPasswordTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+
+    def test_correct_password_keeps_slow_hash(self):
+        password = make_password('pwd')
+        item = ItemFactory(user=self.user, password=password)
+
+        self.assertTrue(check_item_password('pwd', item))
+        self.assertEqual(item.password, password)
+        self.assertEqual(Item.objects.get(pk=item.pk).password, password)
+
+    def test_correct_password_upgrades_outdated_hash_to_default(self):
+        password = make_password('pwd', hasher='pbkdf2_sha1')
+        item = ItemFactory(user=self.user, password=password)
+
+        self.assertTrue(check_item_password('pwd', item))
+        self.assertTrue(item.password.startswith('pbkdf2_sha256$'))
+        self.assertEqual(
+            Item.objects.get(pk=item.pk).password, item.password,
+        )
+
+    def test_incorrect_password_keeps_hash(self):
+        password = make_password('pwd')
+        item = ItemFactory(user=self.user, password=password)
+
+        self.assertFalse(check_item_password('incorrect', item))
+        self.assertEqual(Item.objects.get(pk=item.pk).password, password)
+
+    def test_missing_password_fails(self):
+        item = ItemFactory(user=self.user, password=make_item_password('pwd'))
+
+        self.assertFalse(check_item_password(None, item))
@@ -1,14 +1,20 @@
+import threading
 from datetime import datetime
+from unittest import skipUnless
 
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
 from freezegun import freeze_time
+from parameterized import parameterized
 
 from core.factories import UserFactory
 from items.factories import ItemFactory
-from items.models import Item
+from items.models import (
+    Item, ItemDailyStats, item_cache, visit_count_buffer,
+)
 
 
 class ItemModelTestCase(TestCase):
@@ -40,8 +46,266 @@ class ItemModelTestCase(TestCase):
     def test_all_objects_manager_returns_all_items(self):
         self.assertEqual(Item.all_objects.all().count(), 3)
 
+    @freeze_time(today)
+    def test_default_manager_uses_item_expiry(self):
+        item = self._create_item(
+            UserFactory(), expires_at=self.today + relativedelta(seconds=1),
+        )
+        self.assertTrue(Item.objects.filter(pk=item.pk).exists())
+
+        with freeze_time(item.expires_at):
+            self.assertFalse(Item.objects.filter(pk=item.pk).exists())
+
     def test_str_for_item_with_url(self):
         self.assertEqual(str(self.url_item), self.url_item.url)
 
     def test_str_for_item_with_fiel(self):
         self.assertEqual(str(self.file_item), self.file_item.file)
+
+    @freeze_time(today)
+    def test_first_visit_increments_daily_stats(self):
+        item = self._create_item(UserFactory(), url='http://kodziek.pl')
+        Item.increment_visit_count(item.pk)
+        Item.increment_visit_count(item.pk)
+        stats = ItemDailyStats.objects.get(date=self.today.date())
+
+        self.assertEqual((stats.files, stats.links), (0, 1))
+
+    @freeze_time(today)
+    def test_first_visits_of_the_same_day_share_daily_stats(self):
+        user = UserFactory()
+        for item in (
+                self._create_item(user, url='http://kodziek.pl'),
+                self._create_item(user, url='http://kodziek.pl'),
+                self._create_item(user, file='file'),
+        ):
+            Item.increment_visit_count(item.pk)
+        stats = ItemDailyStats.objects.get(date=self.today.date())
+
+        self.assertEqual((stats.files, stats.links), (1, 2))
+
+    @freeze_time(today)
+    def test_first_visits_of_other_users_have_own_daily_stats(self):
+        first_user, second_user = UserFactory(), UserFactory()
+        for item in (
+                self._create_item(first_user, url='http://kodziek.pl'),
+                self._create_item(second_user, file='file'),
+        ):
+            Item.increment_visit_count(item.pk)
+
+        self.assertEqual(
+            list(ItemDailyStats.objects.order_by('user').values_list(
+                'user', 'files', 'links',
+            )),
+            [(first_user.pk, 0, 1), (second_user.pk, 1, 0)],
+        )
+
+    def test_shared_daily_stats_are_unique_by_date(self):
+        ItemDailyStats.objects.create(date=self.today.date(), files=1)
+
+        with self.assertRaises(IntegrityError):
+            ItemDailyStats.objects.create(date=self.today.date(), links=1)
+
+    def test_deleted_user_stats_are_folded_into_shared_stats(self):
+        user = UserFactory()
+        yesterday = (self.today - relativedelta(days=1)).date()
+        ItemDailyStats.objects.create(date=yesterday, files=1, links=2)
+        ItemDailyStats.objects.bulk_create([
+            ItemDailyStats(date=yesterday, user=user, files=3),
+            ItemDailyStats(date=self.today.date(), user=user, links=4),
+        ])
+        user.delete()
+
+        self.assertEqual(
+            list(ItemDailyStats.objects.values_list(
+                'date', 'user', 'files', 'links',
+            )),
+            [(yesterday, None, 4, 2), (self.today.date(), None, 0, 4)],
+        )
+
+
+class ItemVisitCountTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.item = ItemFactory(user=UserFactory(), url='http://kodziek.pl')
+
+    def _visit_count(self):
+        self.item.refresh_from_db()
+        return self.item.visit_count
+
+    @override_settings(ITEMS_VISIT_COUNTER='locking')
+    def test_locking_counter_increments_visit_count(self):
+        Item.increment_visit_count(self.item.pk)
+        Item.increment_visit_count(self.item.pk)
+
+        self.assertEqual(self._visit_count(), 2)
+
+    @override_settings(ITEMS_VISIT_COUNTER='atomic')
+    def test_atomic_counter_increments_visit_count(self):
+        Item.increment_visit_count(self.item.pk)
+        Item.increment_visit_count(self.item.pk)
+
+        self.assertEqual(self._visit_count(), 2)
+        self.assertEqual(ItemDailyStats.objects.get().links, 1)
+
+    @override_settings(ITEMS_VISIT_COUNTER='buffered')
+    def test_buffered_counter_increments_visit_count_on_flush(self):
+        Item.increment_visit_count(self.item.pk)
+        Item.increment_visit_count(self.item.pk)
+
+        self.assertEqual(self._visit_count(), 0)
+        visit_count_buffer.flush()
+        self.assertEqual(self._visit_count(), 2)
+        self.assertEqual(ItemDailyStats.objects.get().links, 1)
+
+    @override_settings(ITEMS_VISIT_COUNTER='buffered')
+    def test_buffered_counter_does_not_lose_concurrent_visits(self):
+        def visit():
+            for _ in range(100):
+                Item.increment_visit_count(self.item.pk)
+
+        threads = [threading.Thread(target=visit) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        visit_count_buffer.flush()
+
+        self.assertEqual(self._visit_count(), 800)
+
+    def test_add_visit_counts_updates_many_items(self):
+        other_item = ItemFactory(user=self.item.user, file='file')
+        Item.add_visit_counts({self.item.pk: 3, other_item.pk: 1})
+        other_item.refresh_from_db()
+        stats = ItemDailyStats.objects.get()
+
+        self.assertEqual((self._visit_count(), other_item.visit_count), (3, 1))
+        self.assertEqual((stats.files, stats.links), (1, 1))
+
+
+@skipUnless(
+    connection.vendor == 'postgresql', 'SQLite serializes all writers.',
+)
+class ItemConcurrentVisitCountTestCase(TransactionTestCase):
+    @parameterized.expand(['locking', 'atomic'])
+    def test_concurrent_visits_are_not_lost(self, counter):
+        item = ItemFactory(user=UserFactory(), url='http://kodziek.pl')
+
+        def visit():
+            try:
+                for _ in range(20):
+                    Item.increment_visit_count(item.pk)
+            finally:
+                connection.close()
+
+        with override_settings(ITEMS_VISIT_COUNTER=counter):
+            threads = [threading.Thread(target=visit) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        item.refresh_from_db()
+
+        self.assertEqual(item.visit_count, 160)
+        self.assertEqual(ItemDailyStats.objects.get().links, 1)
+
+
+class ItemCacheTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+
+    def setUp(self):
+        item_cache.clear()
+        self.item = ItemFactory(
+            user=self.user, url='http://kodziek.pl', visit_count=2,
+        )
+
+    def test_get_cached_reads_database_once(self):
+        with self.assertNumQueries(1):
+            Item.get_cached(self.item.uuid)
+        with self.assertNumQueries(0):
+            item = Item.get_cached(str(self.item.uuid))
+
+        self.assertEqual(item.pk, self.item.pk)
+        self.assertEqual(item.password, self.item.password)
+        self.assertEqual(item.url, self.item.url)
+        self.assertEqual(item.expires_at, self.item.expires_at)
+
+    def test_visit_count_is_read_from_database(self):
+        item = Item.get_cached(self.item.uuid)
+        Item.increment_visit_count(self.item.pk)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(item.visit_count, 3)
+
+    @parameterized.expand([
+        ('missing', '00000000-0000-0000-0000-000000000000'),
+        ('invalid', 'uuid'),
+    ])
+    def test_get_cached_raises_does_not_exist(self, _, uuid):
+        with self.assertRaises(Item.DoesNotExist):
+            Item.get_cached(uuid)
+
+    def test_cache_never_outlives_item(self):
+        with freeze_time(self.item.expires_at - relativedelta(seconds=1)):
+            item = ItemFactory(user=self.user)
+            Item.get_cached(self.item.uuid)
+            Item.get_cached(item.uuid)
+        with freeze_time(self.item.expires_at):
+            with self.assertRaises(Item.DoesNotExist):
+                Item.get_cached(self.item.uuid)
+            with self.assertNumQueries(0):
+                Item.get_cached(item.uuid)
+
+    def test_cached_hit_of_expired_item_raises_does_not_exist(self):
+        Item.get_cached(self.item.uuid)
+        key = str(self.item.uuid)
+        # entry outliving the item, e.g. after clock adjustment
+        item_cache.set(key, item_cache.get(key), ttl=10 ** 10)
+
+        with freeze_time(self.item.expires_at):
+            with self.assertNumQueries(0):
+                with self.assertRaises(Item.DoesNotExist):
+                    Item.get_cached(self.item.uuid)
+        self.assertIsNone(item_cache.get(key))
+
+    def test_save_invalidates_cache(self):
+        Item.get_cached(self.item.uuid)
+        self.item.password = 'changed'
+        self.item.save()
+
+        self.assertEqual(Item.get_cached(self.item.uuid).password, 'changed')
+
+    def test_purge_invalidates_cache(self):
+        Item.get_cached(self.item.uuid)
+        Item.all_objects.filter(pk=self.item.pk).update(
+            expires_at=datetime.now(),
+        )
+        Item.delete_expired(10)
+
+        with self.assertRaises(Item.DoesNotExist):
+            Item.get_cached(self.item.uuid)
+
+
+class ItemExpiryQueryPlanTestCase(TestCase):
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite query plan.')
+    def test_sqlite_filters_by_expires_at_index(self):
+        plan = Item.objects.all().explain()
+        self.assertRegex(plan, r'USING INDEX items_item_expires_at_\w+')
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite query plan.')
+    def test_sqlite_finds_expired_items_by_expires_at_index(self):
+        plan = Item.all_objects.filter(
+            expires_at__lte=datetime.now(),
+        ).order_by('expires_at').explain()
+        self.assertRegex(plan, r'USING INDEX items_item_expires_at_\w+')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    @skipUnless(connection.vendor == 'postgresql', 'PostgreSQL query plan.')
+    def test_postgresql_filters_by_expires_at_index(self):
+        with connection.cursor() as cursor:
+            # tables in tests are too small for planner to prefer index
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = Item.objects.all().explain()
+        self.assertRegex(plan, r'Index .*Scan .*items_item_expires_at_\w+')
@@ -0,0 +1,206 @@
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from io import StringIO
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from freezegun import freeze_time
+
+from core.factories import UserFactory
+from items.factories import ItemFactory
+from items.models import Item, lock_private_files, private_storage
+from items.storage import (
+    CompressedContentAddressedStorage, CompressedFileSystemStorage,
+    ContentAddressedStorage, get_blob_name, is_blob_name, is_compressed_name,
+)
+
+
+class ContentAddressedStorageTestCase(SimpleTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    def tearDown(self):
+        shutil.rmtree(self.location)
+
+    def test_stores_identical_content_once(self):
+        first = self.storage.save('a.txt', ContentFile(b'content'))
+        second = self.storage.save('b.txt', ContentFile(b'content'))
+        other = self.storage.save('c.txt', ContentFile(b'other'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertTrue(is_blob_name(first))
+        self.assertTrue(first.endswith('.txt'))
+        with self.storage.open(first) as file:
+            self.assertEqual(file.read(), b'content')
+        self.assertEqual(
+            sorted(
+                file for _, _, files in os.walk(self.location)
+                for file in files
+            ),
+            sorted(os.path.basename(name) for name in (first, other)),
+        )
+
+    def test_moves_temporary_file_into_place(self):
+        content = TemporaryUploadedFile('a.txt', 'text/plain', 7, None)
+        content.write(b'content')
+        content.seek(0)
+
+        name = self.storage.save('a.txt', content)
+        content.close()
+
+        self.assertEqual(
+            name, self.storage.save('b.txt', ContentFile(b'content')),
+        )
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), b'content')
+
+
+class CompressedStorageTestCase(SimpleTestCase):
+    content = b'line of log\n' * 1000
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.location)
+
+    def test_compresses_compressible_files(self):
+        storage = CompressedFileSystemStorage(location=self.location)
+        name = storage.save('file.log', ContentFile(self.content))
+        other_name = storage.save('file.log', ContentFile(self.content))
+
+        self.assertTrue(is_compressed_name(name))
+        self.assertNotEqual(name, other_name)
+        self.assertLess(storage.size(name), len(self.content))
+        with storage.open(name) as file:
+            self.assertEqual(gzip.decompress(file.read()), self.content)
+
+    def test_keeps_incompressible_files_raw(self):
+        storage = CompressedFileSystemStorage(location=self.location)
+        for file_name in ('file.zip', 'file.tar.gz', 'file.png'):
+            name = storage.save(file_name, ContentFile(self.content))
+
+            self.assertEqual(name, file_name)
+            self.assertEqual(storage.size(name), len(self.content))
+
+    def test_deduplicates_compressed_files(self):
+        storage = CompressedContentAddressedStorage(location=self.location)
+        name = storage.save('a.log', ContentFile(self.content))
+
+        self.assertEqual(
+            name, storage.save('b.log', ContentFile(self.content)),
+        )
+        self.assertTrue(is_compressed_name(name))
+        self.assertTrue(is_blob_name(name))
+        self.assertTrue(name.endswith('.log'))
+
+
+class SharedFilesTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+
+    def setUp(self):
+        self.blob_name = get_blob_name('ab' * 32, 'file.txt')
+        private_storage.save(self.blob_name, ContentFile(b'content'))
+
+    def tearDown(self):
+        private_storage.delete(self.blob_name)
+
+    def _create_expired_item(self, **kwargs):
+        expired_date = (
+            datetime.now() - settings.ITEMS_LIFETIME - relativedelta(seconds=5)
+        )
+        with freeze_time(expired_date):
+            return ItemFactory(user=self.user, **kwargs)
+
+    def test_purge_keeps_blob_referenced_by_live_item(self):
+        self._create_expired_item(file=self.blob_name)
+        ItemFactory(user=self.user, file=self.blob_name)
+
+        self.assertEqual(Item.delete_expired(10), (1, 0, 0))
+        self.assertTrue(private_storage.exists(self.blob_name))
+
+    def test_purge_deletes_blob_after_last_item_expires(self):
+        self._create_expired_item(file=self.blob_name)
+        self._create_expired_item(file=self.blob_name)
+
+        self.assertEqual(Item.delete_expired(10), (2, 1, 0))
+        self.assertFalse(private_storage.exists(self.blob_name))
+
+    def test_interrupted_purge_keeps_rows_of_files_left(self):
+        item = self._create_expired_item(file=self.blob_name)
+        with mock.patch.object(
+                private_storage, 'delete', side_effect=OSError,
+        ):
+            with self.assertRaises(OSError):
+                Item.delete_expired(10)
+
+        self.assertTrue(Item.all_objects.filter(pk=item.pk).exists())
+        self.assertEqual(Item.delete_expired(10), (1, 1, 0))
+        self.assertFalse(private_storage.exists(self.blob_name))
+
+    def test_purge_waits_for_files_being_stored(self):
+        self._create_expired_item(file=self.blob_name)
+        purged = threading.Event()
+
+        def purge():
+            with lock_private_files(exclusive=True):
+                purged.set()
+
+        with lock_private_files():
+            thread = threading.Thread(target=purge)
+            thread.start()
+            self.assertFalse(purged.wait(0.1))
+        thread.join()
+
+        self.assertTrue(purged.is_set())
+
+
+class DedupeItemFilesCommandTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+
+    def test_moves_files_into_shared_blobs(self):
+        items = [
+            ItemFactory(
+                user=self.user, file=ContentFile(content, name='file.txt'),
+            )
+            for content in (b'content', b'content', b'other')
+        ]
+        orphan_name = get_blob_name('cd' * 32, '')
+        private_storage.save(orphan_name, ContentFile(b'orphan'))
+        stdout = StringIO()
+
+        call_command('dedupe_item_files', '--sweep', stdout=stdout)
+
+        names = [
+            Item.all_objects.get(pk=item.pk).file.name for item in items
+        ]
+        self.assertEqual(names[0], names[1])
+        self.assertNotEqual(names[0], names[2])
+        for item, name in zip(items, names):
+            self.assertTrue(is_blob_name(name))
+            self.assertFalse(private_storage.exists(item.file.name))
+        with private_storage.open(names[2]) as file:
+            self.assertEqual(file.read(), b'other')
+        self.assertFalse(private_storage.exists(orphan_name))
+        self.assertIn(
+            'Moved 2 files into blobs, deleted 1 duplicates, 0 missing.',
+            stdout.getvalue(),
+        )
+        self.assertIn('Swept 1 orphaned blobs.', stdout.getvalue())
+        for name in set(names):
+            private_storage.delete(name)
@@ -3,7 +3,7 @@ from datetime import datetime
 from django.conf import settings
 from django.contrib.auth.hashers import make_password
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse, reverse_lazy
 from freezegun import freeze_time
 
@@ -81,6 +81,18 @@ class CreateItemViewTestCase(TestCase):
         self.assertRedirects(response, self.url)
         self.assertEqual(items.count(), 1)
 
+    @freeze_time('2017-10-25 12:00')
+    def test_post_create_item_with_lifetime(self):
+        self.client.force_login(self.user)
+        data = {
+            'url': 'http://kodziek.pl',
+            'lifetime': '3600',
+        }
+        self.client.post(self.url, data)
+        item = Item.objects.get(user=self.user)
+
+        self.assertEqual(item.expires_at, datetime(2017, 10, 25, 13, 0))
+
     def test_post_create_item_with_file(self):
         self.client.force_login(self.user)
         data = {
@@ -179,6 +191,89 @@ class GetItemViewTestCase(TestCase):
         self.assertEqual(response_content, self.file_content)
         self.assertEqual(self.file_item.visit_count, 1)
 
+    @override_settings(ITEMS_FILE_DELIVERY='x-sendfile')
+    def test_post_sends_file_by_front_proxy(self):
+        data = {
+            'password': self.password,
+        }
+        response = self.client.post(self.file_item_url, data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Sendfile'], self.file_item.file.path)
+        self.assertEqual(response.content, b'')
+
+    def test_post_sets_grant_cookie(self):
+        data = {
+            'password': self.password,
+        }
+        response = self.client.post(self.file_item_url, data)
+
+        self.assertIn(settings.ITEMS_GRANT_COOKIE_NAME, response.cookies)
+
+    def test_get_with_grant_returns_file_without_visit_count(self):
+        data = {
+            'password': self.password,
+        }
+        self.client.post(self.file_item_url, data)
+        response = self.client.get(self.file_item_url)
+        self.file_item.refresh_from_db()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            b''.join(response.streaming_content), self.file_content,
+        )
+        self.assertEqual(self.file_item.visit_count, 1)
+
+    def test_get_with_grant_resumes_file_download(self):
+        data = {
+            'password': self.password,
+        }
+        self.client.post(self.file_item_url, data)
+        response = self.client.get(self.file_item_url, HTTP_RANGE='bytes=-4')
+        self.file_item.refresh_from_db()
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'tent')
+        self.assertEqual(self.file_item.visit_count, 1)
+
+    def test_post_range_is_not_counted_as_visit(self):
+        data = {
+            'password': self.password,
+        }
+        response = self.client.post(
+            self.file_item_url, data, HTTP_RANGE='bytes=3-',
+        )
+        self.file_item.refresh_from_db()
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'tent')
+        self.assertEqual(self.file_item.visit_count, 0)
+
+    def test_post_range_from_first_byte_is_counted_as_visit(self):
+        data = {
+            'password': self.password,
+        }
+        response = self.client.post(
+            self.file_item_url, data, HTTP_RANGE='bytes=0-2',
+        )
+        self.file_item.refresh_from_db()
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'con')
+        self.assertEqual(self.file_item.visit_count, 1)
+
+    def test_post_unsatisfiable_range_is_counted_as_visit(self):
+        data = {
+            'password': self.password,
+        }
+        response = self.client.post(
+            self.file_item_url, data, HTTP_RANGE='bytes=100-',
+        )
+        self.file_item.refresh_from_db()
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(self.file_item.visit_count, 1)
+
     def test_post_to_old_file_raises_404_not_found(self):
         data = {
             'password': self.password,
@@ -1,3 +1,7 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework.exceptions import ValidationError
 
 
@@ -11,7 +15,18 @@ class OneOf(object):
                 'Expecting just one field from following list: '
                 f'{self.fields}.',
             )
-        if not value:
+        if not set(self.fields).intersection(value):
             raise ValidationError(
                 f'One of following fields is required: {self.fields}.',
             )
+
+
+def validate_lifetime(value):
+    now = datetime.now()
+    if value <= timedelta(0):
+        raise DjangoValidationError('Lifetime has to be positive.')
+    if now + value > now + settings.ITEMS_MAX_LIFETIME:
+        raise DjangoValidationError(
+            'Lifetime cannot be longer than '
+            f'{now + settings.ITEMS_MAX_LIFETIME - now}.',
+        )
@@ -1,14 +1,15 @@
 from django.contrib import messages
-from django.contrib.auth.hashers import make_password
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import FileResponse
-from django.shortcuts import get_object_or_404
+from django.http import Http404, HttpResponseRedirect
 from django.urls import reverse_lazy, reverse
 from django.views.generic import CreateView, FormView
 
 from core.helpers import generate_random_password
+from items.delivery import get_file_response, is_resumed_download
 from items.forms import ItemAccessForm, ItemForm
-from items.models import Item
+from items.grants import check_grant, get_request_grant, set_grant
+from items.hashers import make_item_password
+from items.models import Item, get_expires_at
 
 
 class CreateItemView(LoginRequiredMixin, CreateView):
@@ -21,8 +22,10 @@ class CreateItemView(LoginRequiredMixin, CreateView):
 
         instance = form.save(commit=False)
         instance.user = self.request.user
-        instance.password = make_password(password)
+        instance.password = make_item_password(password)
+        instance.expires_at = get_expires_at(form.cleaned_data['lifetime'])
         instance.save()
+        self.object = instance
 
         url = self.request.build_absolute_uri(
             reverse('items:get', kwargs={'uuid': instance.uuid})
@@ -35,7 +38,8 @@ class CreateItemView(LoginRequiredMixin, CreateView):
             extra_tags='safe',
         )
 
-        return super().form_valid(form)
+        # super().form_valid would save already saved instance once again
+        return HttpResponseRedirect(self.get_success_url())
 
 
 class GetItemView(FormView):
@@ -44,9 +48,17 @@ class GetItemView(FormView):
     object = None
 
     def dispatch(self, request, *args, **kwargs):
-        self.object = get_object_or_404(Item, uuid=kwargs['uuid'])
+        try:
+            self.object = Item.get_cached(kwargs['uuid'])
+        except Item.DoesNotExist:
+            raise Http404
         return super().dispatch(request, *args, **kwargs)
 
+    def get(self, request, *args, **kwargs):
+        if check_grant(get_request_grant(request), self.object):
+            return self._get_item_response()
+        return super().get(request, *args, **kwargs)
+
     def get_success_url(self):
         return self.object.url
 
@@ -56,8 +68,11 @@ class GetItemView(FormView):
         return kwargs
 
     def form_valid(self, form):
-        Item.increment_visit_count(self.object.pk)
-        if self.object.file:
-            return FileResponse(self.object.file)
+        if not is_resumed_download(self.request, self.object):
+            Item.increment_visit_count(self.object.pk)
+        return set_grant(self._get_item_response(), self.request, self.object)
 
-        return super().form_valid(form)
+    def _get_item_response(self):
+        if self.object.file:
+            return get_file_response(self.request, self.object)
+        return HttpResponseRedirect(self.get_success_url())
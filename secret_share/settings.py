@@ -53,8 +53,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.TimingMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -107,6 +109,13 @@ DATABASES = {
     },
 }
 
+# Safe requests read from random replica alias until they write, other
+# requests and clients which wrote recently (cookie) use primary only.
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+DATABASE_REPLICA_PIN_COOKIE_NAME = 'primary_pin'
+DATABASE_REPLICA_PIN_AGE = 5  # seconds
+
 
 AUTH_USER_MODEL = 'core.User'
 LOGIN_URL = reverse_lazy('login')
@@ -131,6 +140,14 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'items.hashers.HMACSHA256PasswordHasher',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
@@ -152,11 +169,71 @@ USE_TZ = False
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static_root')
 PRIVATE_MEDIA = '/private_media/'
+PRIVATE_MEDIA_ROOT = f'{BASE_DIR}{PRIVATE_MEDIA}'
+
+# How files of items are sent: 'stream' by application server itself,
+# 'x-accel-redirect' (nginx) or 'x-sendfile' (apache, lighttpd) by front
+# proxy after password check.
+ITEMS_FILE_DELIVERY = 'stream'
+ITEMS_FILE_ACCEL_REDIRECT_PREFIX = PRIVATE_MEDIA
+# 'items.storage.ContentAddressedStorage' stores identical files once, blobs
+# are purged only after the last item referring to them.
+ITEMS_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
+# used by 'items.storage.CompressedFileSystemStorage' and
+# 'items.storage.CompressedContentAddressedStorage' which gzip compressible
+# files at rest
+ITEMS_FILE_COMPRESSION_LEVEL = 6
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
     ),
 }
+# authenticated tokens are cached in process, token deletion and changes of
+# its user invalidate them, other processes keep them until short TTL ends
+TOKEN_CACHE_MAX_SIZE = 1024
+TOKEN_CACHE_TTL = 5  # seconds
+
+# durations of request phases in Server-Timing header let clients time
+# password checks, so they are sent only in DEBUG or when enabled here
+SERVER_TIMING_HEADER = False
+
+# last user agents of users are written in batches
+USER_AGENT_FLUSH_INTERVAL = 5  # seconds
+USER_AGENT_FLUSH_SIZE = 1000
 
 ITEMS_LIFETIME = relativedelta(days=1)
+ITEMS_MAX_LIFETIME = relativedelta(days=7)
+ITEMS_BULK_CREATE_MAX = 1000
+ITEMS_STATUS_MAX = 1000
+ITEMS_STATS_PAGE_MAX = 1000
+# stats responses are cached in every process, rollup changes made by other
+# processes are picked up after ITEMS_STATS_CACHE_TTL at the latest
+ITEMS_STATS_CACHE_MAX_SIZE = 100
+ITEMS_STATS_CACHE_TTL = 30  # seconds
+# larger responses are streamed without being cached and without ETag
+ITEMS_STATS_CACHE_MAX_BODY = 256 * 1024  # characters
+# immutable fields of items are cached in every process, changes made by
+# other processes (e.g. password set in admin) are picked up after
+# ITEMS_CACHE_TTL at the latest, expiry is checked on every hit
+ITEMS_CACHE_MAX_SIZE = 10000
+ITEMS_CACHE_TTL = 10  # seconds
+# chunked uploads not updated for that long are garbage collected
+ITEMS_UPLOAD_LIFETIME = relativedelta(days=1)
+
+# Visit counting mode: 'atomic' updates counter in place on every visit,
+# 'buffered' accumulates visits in process and flushes them in batches
+# and 'locking' locks the item row for read-modify-write.
+ITEMS_VISIT_COUNTER = 'atomic'
+ITEMS_VISIT_COUNT_FLUSH_INTERVAL = 5  # seconds
+ITEMS_VISIT_COUNT_FLUSH_SIZE = 1000
+
+# Hasher algorithm of item passwords, stored hashes made with other hasher
+# are upgraded on successful check.
+ITEMS_PASSWORD_HASHER = 'hmac_sha256'
+ITEMS_PASSWORD_SECRET = SECRET_KEY
+
+# Signed grant issued after successful password check lets client fetch item
+# again without password. It never outlives the item itself.
+ITEMS_GRANT_LIFETIME = relativedelta(minutes=15)
+ITEMS_GRANT_COOKIE_NAME = 'item_grant'
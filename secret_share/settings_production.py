@@ -1,5 +1,5 @@
 import dj_database_url
-from decouple import config
+from decouple import Csv, config
 
 from secret_share.settings import *
 
@@ -12,3 +12,13 @@ ALLOWED_HOSTS = (
 )
 
 DATABASES['default'] = dj_database_url.config(default=config('DATABASE_URL'))
+for index, url in enumerate(
+        config('DATABASE_REPLICA_URLS', default='', cast=Csv())):
+    DATABASES[f'replica_{index}'] = dj_database_url.parse(url)
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+ITEMS_VISIT_COUNTER = config('ITEMS_VISIT_COUNTER', default='atomic')
+ITEMS_PASSWORD_SECRET = config('ITEMS_PASSWORD_SECRET', default=SECRET_KEY)
+ITEMS_FILE_STORAGE = config(
+    'ITEMS_FILE_STORAGE', default='items.storage.ContentAddressedStorage',
+)
@@ -1,3 +1,7 @@
+import atexit
+import shutil
+import tempfile
+
 import dj_database_url
 from decouple import config
 
@@ -9,3 +13,17 @@ DATABASES['default'] = {
     'ENGINE': 'django.db.backends.sqlite3',
     'NAME': ':memory:',
 }
+# stand-in for replica, used only by tests which list it in their databases
+# and enable it with DATABASE_REPLICAS
+DATABASES['replica'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': ':memory:',
+}
+
+# files stored by tests are removed with the whole directory after the run
+PRIVATE_MEDIA_ROOT = tempfile.mkdtemp(prefix='secret_share_media_')
+atexit.register(shutil.rmtree, PRIVATE_MEDIA_ROOT, ignore_errors=True)
+
+# buffers are flushed explicitly in tests, never from background thread
+ITEMS_VISIT_COUNT_FLUSH_INTERVAL = 3600
+USER_AGENT_FLUSH_INTERVAL = 3600
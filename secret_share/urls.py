@@ -20,11 +20,13 @@ from django.urls import include, path
 from rest_framework import routers
 from rest_framework.authtoken.views import obtain_auth_token
 
-from items.api import ItemApiViewSet, StatsApiViewSet
+from core.api import MetricsApiView
+from items.api import ItemApiViewSet, StatsApiViewSet, UploadApiViewSet
 
 router = routers.SimpleRouter()
 router.register('items', ItemApiViewSet)
 router.register('stats', StatsApiViewSet, basename='stats')
+router.register('uploads', UploadApiViewSet, basename='upload')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -34,6 +36,7 @@ urlpatterns = [
     path('logout/', LogoutView.as_view(), name='logout'),
     path('item/', include('items.urls')),
     path('api/login/', obtain_auth_token),
+    path('api/metrics/', MetricsApiView.as_view(), name='metrics'),
     path('api/', include(router.urls)),
 ]
 